@@ -0,0 +1,173 @@
+import queue
+import random
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from agent import Agent, STATE_SIZE
+from engine import HeadlessApp
+from model import Linear_QNet
+from helper import Plotter
+from checkpoint import CheckpointManager
+
+# Tryb aktor/uczeń: procesy aktorów grają kopią sieci odświeżaną co jakiś czas i zapisują przejścia
+# prosto do slotów w pamięci współdzielonej; kolejką idą tylko numery zapełnionych slotów.
+# Proces ucznia trenuje ciągle na próbkach z pamięci powtórek i co publish_every kroków publikuje wagi.
+
+BUFFERS = ('states', 'actions', 'rewards', 'next_states', 'dones')
+
+
+def copy_weights(source, target):
+    with torch.no_grad():
+        for src, dst in zip(source.parameters(), target.parameters()):
+            dst.copy_(src)
+
+
+def shared_buffers(slots, chunk_size):
+    shapes = {
+        'states': ((slots, chunk_size, STATE_SIZE), torch.float32),
+        'actions': ((slots, chunk_size), torch.int64),
+        'rewards': ((slots, chunk_size), torch.float32),
+        'next_states': ((slots, chunk_size, STATE_SIZE), torch.float32),
+        'dones': ((slots, chunk_size), torch.bool),
+    }
+    return {name: torch.zeros(shape, dtype=dtype).share_memory_() for name, (shape, dtype) in shapes.items()}
+
+
+def get_slot(free_slots, stop):
+    while not stop.is_set():
+        try:
+            return free_slots.get(timeout=.1)
+        except queue.Empty:
+            pass
+    return None
+
+
+def actor_loop(actor_id, seed, shared_model, version, lock, games, buffers, free_slots, messages, stop):
+    torch.set_num_threads(1)
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    agent = Agent(training=False)
+    game = HeadlessApp(seed)
+    local_version = -1
+    arrays = {name: tensor.numpy() for name, tensor in buffers.items()}
+    chunk_size = arrays['rewards'].shape[1]
+    slot = get_slot(free_slots, stop)
+    n = 0
+
+    state = agent.get_state(game)
+    while slot is not None:
+        if version.value != local_version:
+            with lock:
+                copy_weights(shared_model, agent.model)
+                local_version = version.value
+        agent.number_of_games = games.value
+
+        final_move = agent.get_action(state)
+        reward, game_over, score = game.play_step(final_move)
+        next_state = agent.get_state(game)
+
+        arrays['states'][slot, n] = state
+        arrays['actions'][slot, n] = final_move.index(1)
+        arrays['rewards'][slot, n] = reward
+        arrays['next_states'][slot, n] = next_state
+        arrays['dones'][slot, n] = game_over
+        n += 1
+        if n == chunk_size:
+            messages.put(('transitions', slot))
+            slot = get_slot(free_slots, stop)
+            n = 0
+
+        if game_over:
+            with games.get_lock():
+                games.value += 1
+            messages.put(('game', actor_id, score, reward))
+            game.tetris.reset()
+            next_state = agent.get_state(game)
+        state = next_state
+
+
+def train_actor_learner(n_actors=2, seed=None, publish_every=50, chunk_size=256, slots_per_actor=4,
+                        memory_path=None, plot_dir=None, max_games=None):
+    agent = Agent(memory_path)
+    plotter = Plotter(plot_dir)
+    checkpoints = CheckpointManager()
+
+    context = mp.get_context('spawn')
+    shared_model = Linear_QNet(STATE_SIZE, 650, 650, 5)
+    copy_weights(agent.model, shared_model)
+    shared_model.share_memory()
+    version = context.Value('i', 0)
+    lock = context.Lock()
+    games = context.Value('i', agent.number_of_games)
+    buffers = shared_buffers(n_actors * slots_per_actor, chunk_size)
+    arrays = {name: tensor.numpy() for name, tensor in buffers.items()}
+    free_slots = context.Queue()
+    for slot in range(n_actors * slots_per_actor):
+        free_slots.put(slot)
+    messages = context.Queue()
+    stop = context.Event()
+    actors = [context.Process(target=actor_loop, daemon=True,
+                              args=(i, None if seed is None else seed + i, shared_model, version, lock,
+                                    games, buffers, free_slots, messages, stop))
+              for i in range(n_actors)]
+    for actor in actors:
+        actor.start()
+
+    total_score = 0
+    record = 0
+    train_steps = 0
+    try:
+        while max_games is None or agent.number_of_games < max_games:
+            # Odbiór wszystkiego, co czeka w kolejce; gdy pamięć pusta - czekamy na aktorów
+            try:
+                message = messages.get(timeout=1) if len(agent.memory) == 0 else messages.get_nowait()
+            except queue.Empty:
+                message = None
+            while message is not None:
+                if message[0] == 'transitions':
+                    slot = message[1]
+                    agent.memory.extend(*(arrays[name][slot] for name in BUFFERS))
+                    free_slots.put(slot)
+                else:
+                    _, actor_id, score, reward = message
+                    agent.number_of_games += 1
+                    total_score += score
+                    if score > record:
+                        record = score
+                        checkpoints.save(agent)
+                    print('Gra: ', agent.number_of_games, ', Aktor: ', actor_id, ', Wynik: ', score,
+                          ' Nagroda: ', reward, ' Rekord: ', record)
+                    plotter.add(score, total_score / agent.number_of_games)
+                try:
+                    message = messages.get_nowait()
+                except queue.Empty:
+                    message = None
+
+            if len(agent.memory) == 0:
+                continue
+            agent.train_long_mem()
+            train_steps += 1
+            if train_steps % publish_every == 0:
+                with lock:
+                    copy_weights(agent.model, shared_model)
+                    version.value += 1
+                agent.memory.flush()
+    finally:
+        stop.set()
+        for actor in actors:
+            while actor.is_alive():
+                actor.join(timeout=.1)
+                try:  # Aktor kończy się dopiero po wysłaniu wszystkiego do kolejki
+                    while True:
+                        messages.get_nowait()
+                except queue.Empty:
+                    pass
+        checkpoints.close()
+        plotter.close()
+
+    return agent
+
+
+if __name__ == '__main__':
+    train_actor_learner()
@@ -1,131 +1,95 @@
 import torch
 import random
 import numpy as np
-from collections import deque
-from main import AppAi
+from types import SimpleNamespace
+from engine import HeadlessApp
+from vec_env import VecGame
+from placement import enumerate_placements
 from model import Linear_QNet, QTrainer
-from helper import plot
-from settings import *
+from replay import ReplayBuffer
+from cache import LRUCache, board_key, state_key
+from profiler import Profiler, NULL_PROFILER
+from checkpoint import CheckpointManager
+from features import FeatureBuilder
+from constants import *
 
 MAX_MEMORY = 100000
+STATE_SIZE = 245
 BATCH_SIZE = 1000
 LR = 0.001
 
 class Agent:
-    def __init__(self):
+    def __init__(self, memory_path=None, training=True, cache_size=0, load=True, n_step=1, target_sync=None, tau=None):
         self.number_of_games = 0
+        self.state_size = STATE_SIZE
         self.epsilon = 0
         self.gamma = 0.9
-        self.memory = deque(maxlen=MAX_MEMORY)
-        self.model = Linear_QNet(245, 650, 650, 5)
-        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)
-
-    def get_state(self, game):
-        field = game.tetris.field_array
-        current_tetromino = game.tetris.tetromino
-        next_tetromino = game.tetris.next_tetromino
-
-        state = []
-
-        # 1. Plansza - 0 jeśli puste, 1 jeśli blok
-        for row in field:
-            state.extend([1 if block else 0 for block in row])
-
-        # 2. Wysokości kolumn
-        col_heights = [game.tetris.get_col_height(col) for col in range(FIELD_W)]
-        state.extend(col_heights)
-
-        # 3. Wyboistość (bumpiness)
-        state.append(game.tetris.calculate_bumpiness())
-
-        # 4. Liczba dziur
-        holes = game.tetris.count_holes()
-        state.append(holes)
-
-        # 5. Stosunek dziur do wysokości planszy (nowa cecha)
-        avg_height = sum(col_heights) / FIELD_W
-        state.append(holes / avg_height if avg_height > 0 else 0)
-
-        # 6. Najwyższy filar (nowa cecha)
-        highest_col = max(col_heights)
-        state.append(highest_col)
-
-        # 7. Różnica między najwyższą a najniższą kolumną (nowa cecha)
-        state.append(highest_col - min(col_heights))
-
-        # 8. Liczba bloków poniżej wysokości 6
-        blocks_below_six = sum(
-            1 for x in range(FIELD_W) for y in range(FIELD_H) if game.tetris.field_array[y][x] and y >= 6
-        )
-        state.append(blocks_below_six)
-
-        # 9. Pozycja tetromino
-        state.append(int(current_tetromino.pos.x))
-        state.append(int(current_tetromino.pos.y))
-
-        # 10. Kształt aktualnego i następnego tetromino (one-hot encoding)
-        shape_index = self.get_shape_index(current_tetromino.shape)
-        next_shape_index = self.get_shape_index(next_tetromino.shape)
-
-        shape_one_hot = [0] * 7
-        shape_one_hot[shape_index] = 1
-        state.extend(shape_one_hot)
-
-        next_shape_one_hot = [0] * 7
-        next_shape_one_hot[next_shape_index] = 1
-        state.extend(next_shape_one_hot)
-
-        # 11. Liczba prawie pełnych rzędów (brakuje od 1 do FIELD_W - 1 bloków do wypełnienia)
-        almost_full_rows_counts = [0] * (FIELD_W - 1)  # Lista dla równań brakujących 1 do FIELD_W - 1 bloków
-
-        for y in range(FIELD_H):
-            filled_blocks = sum(map(bool, field[y]))  # Zliczanie wypełnionych bloków w wierszu
-            if filled_blocks > 0 and filled_blocks < FIELD_W:
-                almost_full_rows_counts[filled_blocks - 1] += 1  # Zwiększamy licznik dla brakujących bloków
-
-        # Dodajemy wyniki do stanu
-        state.extend(almost_full_rows_counts)
-
-        # 12. Najwyższy punkt na planszy
-        highest_point = min((y for y in range(FIELD_H) if any(field[y][x] for x in range(FIELD_W))), default=FIELD_H)
-        state.append(highest_point)
-
-        # 13. Liczba dostępnych ruchów w poziomie (bez kolizji)
-        move_options = sum(1 for dx in range(-FIELD_W, FIELD_W) if current_tetromino.can_move(dx, 0))
-        state.append(move_options)
-
-        # 14. Średnia wysokość kolumn
-        state.append(avg_height)
-
-        # 15. Liczba pustych miejsc wokół aktualnego tetromino (nowa cecha)
-        free_spaces = sum(
-            1 for dx in [-1, 1] for dy in [-1, 1]
-            if 0 <= current_tetromino.pos.x + dx < FIELD_W
-            and 0 <= int(current_tetromino.pos.y + dy) < FIELD_H
-            and not field[int(current_tetromino.pos.y + dy)][int(current_tetromino.pos.x + dx)]
-        )
-        state.append(free_spaces)
-
-        return np.array(state, dtype=float)  # Zamieniłem na float, bo są wartości dziesiętne
-
-    def get_shape_index(self, shape):
-        shape_mapping = {'T': 0, 'O': 1, 'J': 2, 'L': 3, 'I': 4, 'S': 5, 'Z': 6}
-        return shape_mapping.get(shape, -1)
+        # Zwroty n-krokowe w train_long_mem; memory_stride = odstęp kolejnych przejść jednej gry w pamięci
+        self.n_step = n_step
+        self.memory_stride = 1
+        self.model = Linear_QNet(STATE_SIZE, 650, 650, 5)
+        # Agent tylko do gry (np. w procesach ewaluacji) nie potrzebuje pamięci ani trenera
+        self.memory = ReplayBuffer(MAX_MEMORY, STATE_SIZE, memory_path) if training else None
+        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma, load=load,
+                                target_sync=target_sync, tau=tau) if training else None
+        # Cache cech (niezależne od wag) i ocen placementów (czyszczony po każdym kroku uczenia)
+        self.state_cache = LRUCache(cache_size) if cache_size else None
+        self.value_cache = LRUCache(cache_size) if cache_size else None
+        self.features = FeatureBuilder()
+        self.policy = self.model.inference()
+
+    def use_inference(self, backend=None):
+        # Do samej gry (ewaluacja, pokaz): skompilowana/skwantyzowana kopia aktualnych wag
+        self.policy = self.model.inference(backend)
+
+    def get_state(self, game, out=None):
+        if self.state_cache is None:
+            return self.build_state(game, out)
+
+        key = state_key(game.tetris)
+        state = self.state_cache.get(key)
+        if state is None:
+            state = self.build_state(game)
+            self.state_cache.put(key, state)
+        if out is not None:
+            out[:] = state
+            return out
+        return state
+
+    def build_state(self, game, out=None):
+        # Układ cech opisany w features.py (float32); nowa tablica, jeśli nie podano `out`
+        if out is None:
+            out = np.empty(STATE_SIZE, dtype=np.float32)
+        return self.features(game.tetris, out)
+
+    def get_states(self, tetrises, out=None):
+        # Cechy wielu świeżych plansz (bez policzonych BoardStats) jednym wektorowym przebiegiem
+        if out is None:
+            out = np.empty((len(tetrises), STATE_SIZE), dtype=np.float32)
+        if self.state_cache is not None:
+            for i, tetris in enumerate(tetrises):
+                self.get_state(SimpleNamespace(tetris=tetris), out[i])
+            return out
+        return self.features.batch(tetrises, out)
 
     def remember(self, state, action, reward, next_state, game_over):
-        self.memory.append((state, action, reward, next_state, game_over))
+        self.memory.append(state, action, reward, next_state, game_over)
 
     def train_short_mem(self, state, action, reward, next_state, game_over):
         self.trainer.train_step(state, action, reward, next_state, game_over)
+        if self.value_cache is not None:
+            self.value_cache.clear()
 
     def train_long_mem(self):
-        if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE)
+        if len(self.memory) == 0:
+            return
+        if self.n_step > 1:
+            batch = self.memory.sample_n_step(BATCH_SIZE, self.n_step, self.gamma, self.memory_stride)
         else:
-            mini_sample = self.memory
-
-        states, actions, rewards, next_states, game_overs = zip(*mini_sample)
-        self.trainer.train_step(states, actions, rewards, next_states, game_overs)
+            batch = self.memory.sample(BATCH_SIZE)
+        self.trainer.train_step(*batch)
+        if self.value_cache is not None:
+            self.value_cache.clear()
 
     def get_action(self, state):
         self.epsilon = max(5, 50 - self.number_of_games)
@@ -135,42 +99,189 @@ class Agent:
             move = random.randint(0, 4)
             final_move[move] = 1
         else:
-            state0 = torch.tensor(state, dtype=torch.float)
-            prediction = self.model(state0)
-            move = torch.argmax(prediction).item()
+            move = self.policy.act(state)
             final_move[move] = 1
 
         return final_move
 
-def train():
-    plot_scores = []
-    plot_avg_scores = []
+    def get_actions(self, states):
+        # Wersja get_action dla batcha stanów (N, 245): jeden forward dla wszystkich plansz
+        self.epsilon = max(5, 50 - self.number_of_games)
+        moves = torch.argmax(self.policy.predict(states), dim=1).numpy()
+
+        explore = np.random.randint(0, 201, size=len(states)) < self.epsilon
+        moves[explore] = np.random.randint(0, 5, size=explore.sum())
+
+        final_moves = np.zeros((len(states), 5), dtype=np.int64)
+        final_moves[np.arange(len(states)), moves] = 1
+        return final_moves
+
+    def get_placement(self, game):
+        # Tryb placement: ocena wszystkich plansz wynikowych jednym forwardem, wartość = max Q
+        placements = enumerate_placements(game.tetris)
+        values, heads, states = self.evaluate_placements(game.tetris, placements)
+
+        self.epsilon = max(5, 50 - self.number_of_games)
+        if random.randint(0, 200) < self.epsilon:
+            choice = random.randrange(len(placements))
+        else:
+            choice = int(np.argmax(values))
+
+        final_move = [0, 0, 0, 0, 0]
+        final_move[heads[choice]] = 1
+        return placements[choice], states[choice], final_move
+
+    def evaluate_placements(self, tetris, placements):
+        # (max Q, indeks akcji, stan) dla każdej planszy wynikowej; z cache, jeśli plansza już była oceniana.
+        # Klucz zawiera też klocki, które będą następne w stanie wynikowym: peek(0), a przy pierwszej wymianie
+        # (nic nie trzymamy) także peek(1) - wymiana wyciąga następny klocek i dobiera peek(0).
+        keys = None
+        if self.value_cache is not None:
+            parent = board_key(tetris) + (tetris.peek_shape(),)
+            parent_hold = parent + (tetris.pieces.peek(1),) if tetris.held_tetromino is None else parent
+            keys = [(parent_hold if p.hold else parent, p.hold, p.blocks) for p in placements]
+        results = [self.value_cache.get(key) for key in keys] if keys else [None] * len(placements)
+        missing = [i for i, result in enumerate(results) if result is None]
+
+        if missing:
+            states = self.get_states([tetris.simulate(placements[i]) for i in missing])
+            values, heads = self.policy.predict(states).max(dim=1)
+            for j, i in enumerate(missing):
+                results[i] = (values[j].item(), heads[j].item(), states[j])
+                if keys:
+                    self.value_cache.put(keys[i], results[i])
+
+        values, heads, states = zip(*results)
+        return np.array(values), heads, states
+
+def train(watch=False, seed=None, clock=None, memory_path=None, profile=False, profile_every=10, profile_path=None,
+          plot_dir=None, resume=False, keep_checkpoints=3, checkpoint_memory=False, n_step=1, target_sync=None, tau=None, render_every=1):
+    # profile=True: czasy faz (średnie z ostatnich gier) co profile_every gier, opcjonalnie zapis do profile_path
+    # plot_dir: wykres bez okna (scores.csv/scores.png w tym katalogu)
+    # resume=True: wznowienie z ostatniego punktu kontrolnego (wagi, Adam, licznik gier, epsilon, pamięć)
+    # n_step, target_sync/tau: zwroty n-krokowe i sieć docelowa (kopiowana co target_sync kroków lub Polyak)
+    # render_every: przy watch=True rysowanie co N kroków
+    from helper import Plotter
+    plotter = Plotter(plot_dir)
+    checkpoints = CheckpointManager(keep=keep_checkpoints)
     total_score = 0
     record = 0
-    agent = Agent()
-    game = AppAi()
+    agent = Agent(memory_path, n_step=n_step, target_sync=target_sync, tau=tau)
+    if resume:
+        checkpoints.resume(agent)
+    profiler = Profiler(report_every=profile_every, window=profile_every, path=profile_path) if profile else NULL_PROFILER
+    game = HeadlessApp(seed, clock, profiler)
+    if watch:
+        from main import WatchApp
+        game = WatchApp(game, render_every)
 
     while True:
-        state_old = agent.get_state(game)
-        final_move = agent.get_action(state_old)
-        reward, game_over, score = game.play_step(final_move)
-        state_new = agent.get_state(game)
-        agent.train_short_mem(state_old, final_move, reward, state_new, game_over)
-        agent.remember(state_old, final_move, reward, state_new, game_over)
+        with profiler.phase('get_state'):
+            state_old = agent.get_state(game)
+        with profiler.phase('get_action'):
+            final_move = agent.get_action(state_old)
+        with profiler.phase('play_step'):
+            reward, game_over, score = game.play_step(final_move)
+        with profiler.phase('get_state'):
+            state_new = agent.get_state(game)
+        with profiler.phase('train_short_mem'):
+            agent.train_short_mem(state_old, final_move, reward, state_new, game_over)
+        with profiler.phase('remember'):
+            agent.remember(state_old, final_move, reward, state_new, game_over)
         if game_over:
             game.tetris.reset()
             agent.number_of_games += 1
-            agent.train_long_mem()
+            with profiler.phase('train_long_mem'):
+                agent.train_long_mem()
+                agent.memory.flush()
             if score > record:
                 record = score
-                agent.model.save()
+                with profiler.phase('save'):
+                    checkpoints.save(agent, checkpoint_memory)
             print('Gra: ', agent.number_of_games, ', Wynik: ', score, ' Nagroda: ', reward, ' Rekord: ', record)
             print("Gra skończona\n--------------------------------------------------------------------------------------")
-            plot_scores.append(score)
             total_score += score
             mean_score = total_score / agent.number_of_games
-            plot_avg_scores.append(mean_score)
-            plot(plot_scores, plot_avg_scores)
+            with profiler.phase('plot'):
+                plotter.add(score, mean_score)
+            profiler.end_game()
+
+def train_placement(watch=False, seed=None, memory_path=None, plot_dir=None, resume=False, n_step=1, target_sync=None,
+                    tau=None, render_every=1):
+    # Jedna decyzja na klocek: uczenie na planszach wynikowych (afterstate) kolejnych placementów
+    from helper import Plotter
+    plotter = Plotter(plot_dir)
+    checkpoints = CheckpointManager()
+    total_score = 0
+    record = 0
+    agent = Agent(memory_path, n_step=n_step, target_sync=target_sync, tau=tau)
+    if resume:
+        checkpoints.resume(agent)
+    game = HeadlessApp(seed)
+    if watch:
+        from main import WatchApp
+        game = WatchApp(game, render_every)
+    previous = None
+
+    while True:
+        placement, state, final_move = agent.get_placement(game)
+        if previous is not None:
+            agent.train_short_mem(*previous, state, False)
+            agent.remember(*previous, state, False)
+
+        reward, game_over, score = game.play_placement(placement)
+        previous = (state, final_move, reward)
+        if game_over:
+            agent.train_short_mem(state, final_move, reward, state, True)
+            agent.remember(state, final_move, reward, state, True)
+            previous = None
+            game.tetris.reset()
+            agent.number_of_games += 1
+            agent.train_long_mem()
+            agent.memory.flush()
+            if score > record:
+                record = score
+                checkpoints.save(agent)
+            print('Gra: ', agent.number_of_games, ', Wynik: ', score, ' Nagroda: ', reward, ' Rekord: ', record)
+            total_score += score
+            plotter.add(score, total_score / agent.number_of_games)
+
+def train_vec(n_games=8, seed=None, clock_factory=None, memory_path=None, plot_dir=None, resume=False, n_step=1,
+              target_sync=None, tau=None):
+    from helper import Plotter
+    plotter = Plotter(plot_dir)
+    checkpoints = CheckpointManager()
+    total_score = 0
+    record = 0
+    agent = Agent(memory_path, n_step=n_step, target_sync=target_sync, tau=tau)
+    if resume:
+        checkpoints.resume(agent)
+    games = VecGame(n_games, seed, clock_factory)
+    agent.memory_stride = n_games  # extend zapisuje krok wszystkich plansz po kolei
+    states = games.get_states(agent)
+    next_states = np.empty_like(states)
+
+    while True:
+        final_moves = agent.get_actions(states)
+        rewards, game_overs, scores = games.play_step(final_moves)
+        games.get_states(agent, out=next_states)
+        agent.train_short_mem(states, final_moves, rewards, next_states, game_overs)
+        agent.memory.extend(states, final_moves, rewards, next_states, game_overs)
+
+        finished = [(scores[i], rewards[i]) for i in np.flatnonzero(game_overs)]
+        states, next_states = games.reset_done(agent, next_states), states
+
+        for score, reward in finished:
+            agent.number_of_games += 1
+            agent.train_long_mem()
+            if score > record:
+                record = score
+                checkpoints.save(agent)
+            print('Gra: ', agent.number_of_games, ', Wynik: ', score, ' Nagroda: ', reward, ' Rekord: ', record)
+            total_score += score
+            plotter.add(score, total_score / agent.number_of_games)
+        if finished:
+            agent.memory.flush()
 
 if __name__ == '__main__':
     train()
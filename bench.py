@@ -0,0 +1,170 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+import torch
+from constants import *
+from engine import HeadlessApp
+
+# Benchmarki wydajności: symulacja, cechy planszy, trening, ewaluacja populacji.
+# Użycie: python bench.py [--output plik.json] [--only nazwa ...]; wyniki JSON na stdout
+
+SEED = 1234
+ACTIONS = [[int(i == j) for i in range(5)] for j in range(5)]
+
+
+def seed_all(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def measure(fn, repeats=30, number=1, warmup=1):
+    # Czasy pojedynczych wywołań (średnio z `number` wywołań na próbę), mediana i p95
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    times = np.array(times)
+    median = float(np.median(times))
+    return {'median_s': median, 'p95_s': float(np.percentile(times, 95)),
+            'per_sec': 1 / median if median > 0 else float('inf'), 'repeats': repeats, 'number': number}
+
+
+def random_actions(n, seed=SEED):
+    rng = random.Random(seed)
+    return [ACTIONS[rng.randrange(5)] for _ in range(n)]
+
+
+def sample_games(n_games=3, seed=SEED, steps=400):
+    # Reprezentatywne plansze: gry na losowych akcjach zatrzymane po kolejnych liczbach kroków
+    games = []
+    actions = random_actions(steps, seed)
+    for i in range(n_games):
+        game = HeadlessApp(seed + i)
+        for action in actions[:steps * (i + 1) // n_games]:
+            game.play_step(action)
+            if game.tetris.gameover:
+                break
+        games.append(game)
+    return games
+
+
+def bench_engine_step():
+    game = HeadlessApp(SEED)
+    actions = random_actions(1000)
+    step = iter(range(10 ** 9))
+
+    def run():
+        game.tetris.control(actions[next(step) % len(actions)])
+        game.tetris.update()
+        if game.tetris.gameover:
+            game.tetris.reset()
+    return measure(run, repeats=50, number=200)
+
+
+def bench_sprite_step():
+    # Tetris na spritach pygame (bez okna: sterownik "dummy")
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from main import AppAi
+    app = AppAi()
+    app.anim_trigger = app.fast_anim_trigger = True
+    actions = random_actions(1000)
+    step = iter(range(10 ** 9))
+
+    def run():
+        app.tetris.control(actions[next(step) % len(actions)])
+        app.tetris.update()
+        if app.tetris.gameover:
+            app.tetris.reset()
+    return measure(run, repeats=50, number=200)
+
+
+def bench_get_state():
+    from agent import Agent
+    agent = Agent(training=False)
+    games = sample_games()
+    return {f'board{i}': measure(lambda game=game: agent.get_state(game), repeats=50, number=100)
+            for i, game in enumerate(games)}
+
+
+def bench_board_features():
+    results = {}
+    for i, game in enumerate(sample_games()):
+        tetris = game.tetris
+        results[f'board{i}'] = {
+            'count_holes': measure(tetris.count_holes, repeats=50, number=1000),
+            'calculate_bumpiness': measure(tetris.calculate_bumpiness, repeats=50, number=1000),
+        }
+    return results
+
+
+def bench_train_step():
+    from model import Linear_QNet, QTrainer
+    model = Linear_QNet(245, 650, 650, 5)
+    trainer = QTrainer(model, lr=0.001, gamma=0.9, load=False)
+    results = {}
+    for batch_size in (1, 64, 1000):
+        states = np.random.rand(batch_size, 245).astype(np.float32)
+        next_states = np.random.rand(batch_size, 245).astype(np.float32)
+        actions = np.random.randint(0, 5, batch_size)
+        rewards = np.random.rand(batch_size).astype(np.float32)
+        dones = np.random.rand(batch_size) < 0.1
+        batch = [torch.from_numpy(x) for x in (states, actions, rewards, next_states, dones)]
+        results[f'batch{batch_size}'] = measure(lambda: trainer.train_step(*batch),
+                                                repeats=20 if batch_size == 1000 else 50)
+    return results
+
+
+def bench_population():
+    from population import Population
+    # Agenci bez treningu: wagi nie zmieniają się między powtórzeniami, więc każda próba mierzy tę samą politykę
+    population = Population(size=4, seeds=(SEED,), plot_dir=tempfile.mkdtemp(), training=False)
+    result = measure(population.evaluate, repeats=3, warmup=0)
+    population.close()
+    return result
+
+
+BENCHMARKS = {
+    'engine_step': bench_engine_step,
+    'sprite_step': bench_sprite_step,
+    'get_state': bench_get_state,
+    'board_features': bench_board_features,
+    'train_step': bench_train_step,
+    'population_evaluate': bench_population,
+}
+
+
+def run(names=None, output=None):
+    results = {'meta': {'python': platform.python_version(), 'torch': torch.__version__,
+                        'platform': platform.platform(), 'seed': SEED, 'time': time.time()}}
+    for name in names or BENCHMARKS:
+        seed_all()
+        start = time.perf_counter()
+        # Komunikaty mierzonego kodu (wczytanie modelu, nagrody, wyniki gier) na stderr - stdout to tylko JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            results[name] = BENCHMARKS[name]()
+        print(f'{name}: {time.perf_counter() - start:.1f}s', file=sys.stderr, flush=True)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', help='plik JSON z wynikami')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='uruchom tylko wybrane benchmarki')
+    args = parser.parse_args()
+    print(json.dumps(run(args.only, args.output), indent=2))
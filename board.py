@@ -0,0 +1,170 @@
+from constants import *
+
+# Plansza jako maski bitowe wierszy: bit x w rows[y] = zajęte pole (x, y)
+
+FULL_ROW = (1 << FIELD_W) - 1
+
+
+class Bitboard:
+    def __init__(self):
+        self.rows = [0] * FIELD_H
+
+    def set(self, x, y):
+        self.rows[y] |= 1 << x
+
+    def copy(self):
+        board = Bitboard()
+        board.rows = self.rows[:]
+        return board
+
+    def placed(self, cells):
+        # Nowa plansza z dołożonym klockiem i usuniętymi pełnymi wierszami (do przeszukiwania)
+        board = self.copy()
+        for x, y in cells:
+            board.set(x, y)
+        return board, board.clear_full_rows()
+
+    def full_rows(self):
+        return [y for y, row in enumerate(self.rows) if row == FULL_ROW]
+
+    def clear_full_rows(self):
+        # Ta sama kompaktacja co Tetris.chceck_full_rows
+        rows = self.rows
+        if FULL_ROW not in rows:
+            return 0
+
+        row = FIELD_H - 1
+        lines_cleared = 0
+        for y in range(FIELD_H - 1, -1, -1):
+            rows[row] = rows[y]
+            if rows[y] != FULL_ROW:
+                row -= 1
+            else:
+                rows[row] = 0
+                lines_cleared += 1
+        return lines_cleared
+
+    def drop_distance(self, cells, heights=None):
+        # O ile wierszy klocek (lista (x, y)) może spaść - z wysokości kolumn, bez symulowania kroków
+        heights = heights or self.col_heights()
+        distance = None
+        for x, y in cells:
+            top = FIELD_H - heights[x]
+            if y < top:
+                d = top - 1 - y
+            else:
+                # Klocek pod nawisem - szukamy pierwszego zajętego pola niżej
+                mask = 1 << x
+                d = next((row - 1 - y for row in range(y + 1, FIELD_H) if self.rows[row] & mask),
+                         FIELD_H - 1 - y)
+            distance = d if distance is None else min(distance, d)
+        return distance
+
+    def col_heights(self):
+        heights = [0] * FIELD_W
+        seen = 0
+        for y, row in enumerate(self.rows):
+            new = row & ~seen
+            while new:
+                low = new & -new
+                heights[low.bit_length() - 1] = FIELD_H - y
+                new ^= low
+            seen |= row
+            if seen == FULL_ROW:
+                break
+        return heights
+
+    def col_height(self, col):
+        mask = 1 << col
+        for y, row in enumerate(self.rows):
+            if row & mask:
+                return FIELD_H - y
+        return 0
+
+    def bumpiness(self, heights=None):
+        heights = heights or self.col_heights()
+        return sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+
+    def avg_height(self, heights=None):
+        heights = [h for h in (heights or self.col_heights()) if h > 0]
+        return sum(heights) / len(heights) if heights else 0
+
+    def holes(self):
+        # Puste pole pod jakimś blokiem, z blokiem pod spodem i (dnem albo blokiem) dwa pola niżej
+        rows = self.rows
+        holes = 0
+        above = 0
+        for y in range(FIELD_H - 1):
+            below2 = FULL_ROW if y + 2 == FIELD_H else rows[y + 2]
+            holes += (~rows[y] & above & rows[y + 1] & below2).bit_count()
+            above |= rows[y]
+        return holes
+
+    def covered_cells(self):
+        # Wszystkie puste pola pod jakimkolwiek blokiem w kolumnie (klasyczna definicja dziury)
+        covered = 0
+        above = 0
+        for row in self.rows:
+            covered += (~row & above).bit_count()
+            above |= row
+        return covered
+
+    def move_options(self, cells):
+        # Liczba przesunięć dx w [-FIELD_W, FIELD_W) bez kolizji - wszystkie dx naraz na bitach:
+        # bit (dx + FIELD_W) zostaje, jeśli pole (x + dx, y) jest wolne dla każdego bloku klocka
+        valid = (1 << 2 * FIELD_W) - 1
+        for x, y in cells:
+            free = 0 if y >= FIELD_H else FULL_ROW if y < 0 else ~self.rows[y] & FULL_ROW
+            valid &= free << FIELD_W >> x
+        return valid.bit_count()
+
+    def row_counts(self):
+        return [row.bit_count() for row in self.rows]
+
+    def highest_row(self):
+        for y, row in enumerate(self.rows):
+            if row:
+                return y
+        return FIELD_H
+
+
+class BoardStats:
+    # Cechy planszy aktualizowane tylko po zablokowaniu klocka (przyrostowo) i po usunięciu linii (dirty)
+    def __init__(self, board):
+        self.board = board
+        self.dirty = True
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def on_lock(self, cells):
+        if self.dirty:
+            return
+        for x, y in cells:
+            self.row_counts[y] += 1
+            self.col_heights[x] = max(self.col_heights[x], FIELD_H - y)
+        self.derive()
+
+    def refresh(self):
+        if self.dirty:
+            self.col_heights = self.board.col_heights()
+            self.row_counts = self.board.row_counts()
+            self.derive()
+            self.dirty = False
+        return self
+
+    def derive(self):
+        heights = self.col_heights
+        counts = self.row_counts
+
+        self.bumpiness = self.board.bumpiness(heights)
+        self.holes = self.board.holes()
+        self.avg_height = sum(heights) / FIELD_W
+        self.max_height = max(heights)
+        self.min_height = min(heights)
+        self.blocks_below_six = sum(counts[6:])
+        self.almost_full_rows = [0] * (FIELD_W - 1)
+        for filled_blocks in counts:
+            if 0 < filled_blocks < FIELD_W:
+                self.almost_full_rows[filled_blocks - 1] += 1
+        self.highest_point = next((y for y, count in enumerate(counts) if count), FIELD_H)
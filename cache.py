@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+# Tablica transpozycji: ograniczony cache LRU dla cech i wartości sieci dla powtarzających się plansz
+
+
+class LRUCache:
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.data),
+                'hit_rate': self.hits / total if total else 0.0}
+
+
+def shape_of(piece):
+    return piece.shape if piece is not None else None
+
+
+def board_key(tetris):
+    # (plansza, aktualny, następny, trzymany klocek)
+    return (tuple(tetris.board.rows), shape_of(tetris.tetromino),
+            shape_of(tetris.next_tetromino), shape_of(tetris.held_tetromino))
+
+
+def state_key(tetris):
+    # Jak board_key, plus położenie spadającego klocka (od niego zależą cechy ruchu w get_state)
+    return board_key(tetris) + (tuple(tetris.tetromino.cells()),)
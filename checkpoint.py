@@ -0,0 +1,144 @@
+import glob
+import os
+import queue
+import threading
+import torch
+
+# Punkty kontrolne treningu: wagi, stan Adama, licznik gier, epsilon i opcjonalnie pamięć powtórek.
+# Migawka jest kopiowana w wątku treningu, zapis na dysk (plik tymczasowy + rename) w wątku w tle.
+
+MODEL_PATH = './model/model.pth'
+
+_loaded = {}
+
+
+def atomic_save(obj, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    torch.save(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_shared(path):
+    # Jeden odczyt z dysku na proces - kolejni agenci populacji dostają ten sam słownik z pamięci
+    key = os.path.abspath(path)
+    stamp = os.path.getmtime(path)
+    if key not in _loaded or _loaded[key][0] != stamp:
+        _loaded[key] = (stamp, torch.load(path, map_location='cpu'))
+    return _loaded[key][1]
+
+
+def load_model_weights(path=MODEL_PATH):
+    if not os.path.exists(path):
+        print("⚠️ No saved model found. Starting fresh.")
+        return None
+    checkpoint = load_shared(path)
+    return checkpoint['model'] if 'model' in checkpoint else checkpoint
+
+
+def snapshot(agent, include_memory=False):
+    def cpu_copy(value):
+        if isinstance(value, torch.Tensor):
+            return value.detach().to('cpu', copy=True)
+        if isinstance(value, dict):
+            return {k: cpu_copy(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [cpu_copy(v) for v in value]
+        return value
+
+    checkpoint = {
+        'model': cpu_copy(agent.model.state_dict()),
+        'number_of_games': agent.number_of_games,
+        'epsilon': agent.epsilon,
+        'gamma': agent.gamma,
+    }
+    if agent.trainer is not None:
+        checkpoint['optimizer'] = cpu_copy(agent.trainer.optimizer.state_dict())
+    if include_memory and agent.memory is not None:
+        checkpoint['memory'] = agent.memory.state_dict()
+    return checkpoint
+
+
+def restore(agent, checkpoint):
+    agent.model.load_state_dict(checkpoint['model'])
+    agent.number_of_games = checkpoint.get('number_of_games', 0)
+    agent.epsilon = checkpoint.get('epsilon', agent.epsilon)
+    if agent.trainer is not None and 'optimizer' in checkpoint:
+        agent.trainer.optimizer.load_state_dict(checkpoint['optimizer'])
+    if agent.trainer is not None:
+        agent.trainer.sync_target()
+    if agent.memory is not None and 'memory' in checkpoint:
+        agent.memory.load_state_dict(checkpoint['memory'])
+
+
+class CheckpointManager:
+    def __init__(self, directory='./model/checkpoints', keep=3, model_path=MODEL_PATH):
+        if keep < 1:
+            raise ValueError(f'keep must be at least 1, got {keep}')
+        self.directory = directory
+        self.keep = keep
+        self.model_path = model_path  # Same wagi (zgodne z Linear_QNet.load), aktualizowane przy każdym zapisie
+        self.jobs = queue.Queue()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def save(self, agent, include_memory=False):
+        checkpoint = snapshot(agent, include_memory)
+        path = os.path.join(self.directory, f'checkpoint_{agent.number_of_games:07d}.pt')
+        self.jobs.put((path, checkpoint))
+        return path
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                return
+            path, checkpoint = job
+            try:
+                atomic_save(checkpoint, path)
+                if self.model_path:
+                    atomic_save(checkpoint['model'], self.model_path)
+                self.prune()
+                print(f"✅ Checkpoint saved at {path}")
+            except OSError as error:
+                print(f"⚠️ Checkpoint not saved: {error}")
+            finally:
+                self.jobs.task_done()
+
+    def checkpoints(self):
+        # Od najstarszego zapisu do najnowszego: po czasie zapisu, nie po numerze gry w nazwie
+        # (w katalogu mogą zostać pliki z poprzedniego przebiegu z wyższymi numerami)
+        paths = []
+        for path in glob.glob(os.path.join(self.directory, 'checkpoint_*.pt')):
+            try:
+                paths.append((os.path.getmtime(path), path))
+            except OSError:
+                continue  # Usunięty w międzyczasie przez prune z wątku zapisu
+        return [path for _, path in sorted(paths)]
+
+    def prune(self):
+        for path in self.checkpoints()[:-self.keep]:
+            os.remove(path)
+
+    def latest(self):
+        paths = self.checkpoints()
+        return paths[-1] if paths else None
+
+    def load(self, path=None):
+        path = path or self.latest()
+        return load_shared(path) if path else None
+
+    def resume(self, agent):
+        checkpoint = self.load()
+        if checkpoint is not None:
+            restore(agent, checkpoint)
+            print(f"✅ Resumed from {self.latest()} (game {agent.number_of_games})")
+        return checkpoint is not None
+
+    def wait(self):
+        self.jobs.join()
+
+    def close(self):
+        self.jobs.put(None)
+        self.worker.join()
@@ -0,0 +1,21 @@
+# Stałe gry niezależne od pygame (używane przez silnik bez okna)
+
+ANIMATION_TIME = 30
+FAST_ANIMATION = 2
+
+FIELD_SIZE = FIELD_W, FIELD_H = 10,20
+
+SPAWN_OFFSET = (FIELD_W // 2 - 1, 0)
+
+# Liczba ticków logicznego zegara (po FAST_ANIMATION ms) na jeden krok grawitacji
+GRAVITY_TICKS = ANIMATION_TIME // FAST_ANIMATION
+
+TETROMINOES = {
+    'T': [(0, 0), (-1, 0), (1, 0), (0, -1)],
+    'O': [(0, 0), (0, -1), (1, 0), (1, -1)],
+    'J': [(0, 0), (-1, 0), (0, -1), (0, -2)],
+    'L': [(0, 0), (1, 0), (0, -1), (0, -2)],
+    'I': [(0, 0), (0, 1), (0, -1), (0, -2)],
+    'S': [(0, 0), (-1, 0), (0, -1), (1, -1)],
+    'Z': [(0, 0), (1, 0), (0, -1), (-1, -1)]
+}
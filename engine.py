@@ -0,0 +1,351 @@
+import copy
+from collections import namedtuple
+from constants import *
+from board import Bitboard, BoardStats
+from shapes import collides, piece_cells
+from profiler import NULL_PROFILER
+from pieces import PieceSource, SHAPES, UNIFORM
+
+# Silnik gry bez pygame - te same zasady co tetris.py/tetromino.py, ale na liczbach całkowitych
+
+Point = namedtuple('Point', 'x y')
+
+MOVE_DIRECTIONS = {'left': (-1, 0), 'right': (1, 0), 'down': (0, 1)}
+
+
+class Piece:
+    def __init__(self, tetris, shape, held=False, current=True):
+        self.tetris = tetris
+        self.shape = shape
+        self.color = SHAPES.index(shape) + 1
+        self.rotation = 0
+        self.blocks = self.spawn_blocks()
+        self.pos = Point(*self.blocks[0])
+        self.landing = False
+        self.current = current
+        self.held = held
+
+    def spawn_blocks(self):
+        return piece_cells(self.shape, 0, *SPAWN_OFFSET)
+
+    def rotate(self):
+        rotation = (self.rotation + 1) % 4
+        x, y = self.blocks[0]
+        if not collides(self.tetris.board, self.shape, rotation, x, y):
+            self.blocks = piece_cells(self.shape, rotation, x, y)
+            self.rotation = rotation
+
+    def is_cell_collide(self, x, y):
+        if 0 <= x < FIELD_W and y < FIELD_H and (y < 0 or not self.tetris.board.rows[y] >> x & 1):
+            return False
+        return True
+
+    def is_collide(self, block_pos):
+        return any(self.is_cell_collide(x, y) for x, y in block_pos)
+
+    def can_move(self, dx, dy):
+        return not self.is_collide([(x + dx, y + dy) for x, y in self.blocks])
+
+    def cells(self):
+        return self.blocks
+
+    def reset_position(self):
+        self.rotation = 0
+        self.blocks = self.spawn_blocks()
+
+    def landing_distance(self):
+        return self.tetris.board.drop_distance(self.blocks)
+
+    def calculate_landing_position(self):
+        distance = self.landing_distance()
+        return [(x, y + distance) for x, y in self.blocks]
+
+    def hard_drop(self):
+        self.blocks = self.calculate_landing_position()
+        self.landing = True
+
+    def move(self, direction):
+        dx, dy = MOVE_DIRECTIONS[direction]
+        new_block_pos = [(x + dx, y + dy) for x, y in self.blocks]
+
+        if not self.is_collide(new_block_pos):
+            self.blocks = new_block_pos
+        elif direction == 'down':
+            self.landing = True
+
+    def update(self):
+        self.move(direction='down')
+
+
+class TetrisEngine:
+    def __init__(self, seed=None, piece_mode=UNIFORM, sequence=None):
+        self.pieces = PieceSource(seed, piece_mode, sequence)
+        self.points_per_level = {0: 0, 1: 1, 2: 3, 3: 7, 4: 15}
+        self.reset()
+
+    @classmethod
+    def from_board(cls, board, shape, next_shape, held_shape=None):
+        # Gra ustawiona na danej planszy i klockach - np. do liczenia cech planszy z przeszukiwania
+        tetris = cls(seed=0)
+        tetris.board = board.copy()
+        tetris.stats = BoardStats(tetris.board)
+        tetris.field_array = [[row >> x & 1 for x in range(FIELD_W)] for row in tetris.board.rows]
+        tetris.tetromino = Piece(tetris, shape)
+        tetris.next_tetromino = Piece(tetris, next_shape, current=False) if next_shape else None
+        tetris.held_tetromino = Piece(tetris, held_shape, held=True, current=False) if held_shape else None
+        return tetris
+
+    def peek_shape(self):
+        # Kształt, który wylosuje następny new_piece(), bez zmiany stanu generatora
+        return self.pieces.peek()
+
+    def new_piece(self, current=True):
+        return Piece(self, self.pieces.next(), current=current)
+
+    def reset(self):
+        self.field_array = self.get_field_array()
+        self.board = Bitboard()
+        self.stats = BoardStats(self.board)
+        self.tetromino = self.new_piece()
+        self.next_tetromino = self.new_piece(current=False)
+        self.held_tetromino = None
+        self.held_used = False
+        self.speed_up = False
+        self.gameover = False
+        self.reward = 0
+        self.score = 0
+        self.full_lines = 0
+
+    def get_field_array(self):
+        return [[0 for x in range(FIELD_W)] for y in range(FIELD_H)]
+
+    def get_score(self):
+        self.score += self.points_per_level[self.full_lines]
+        self.full_lines = 0
+
+    def get_avg_height(self):
+        return self.board.avg_height()
+
+    def get_col_height(self, col):
+        return self.board.col_height(col)
+
+    def calculate_bumpiness(self):
+        return self.board.bumpiness()
+
+    def count_holes(self):
+        return self.board.holes()
+
+    def put_tetromino_in_array(self):
+        for x, y in self.tetromino.blocks:
+            self.field_array[y][x] = self.tetromino.color
+            self.board.set(x, y)
+        self.stats.on_lock(self.tetromino.blocks)
+
+    def is_gameover(self):
+        return any(y < 0 for _, y in self.tetromino.blocks)
+
+    def chceck_tetromino_landing(self):
+        if self.tetromino.landing:
+            if self.is_gameover():
+                self.gameover = True
+            else:
+                self.speed_up = False
+                self.put_tetromino_in_array()
+                self.next_tetromino.current = True
+                self.tetromino = self.next_tetromino
+                self.next_tetromino = self.new_piece(current=False)
+                self.held_used = False
+
+    def hold_tetromino(self):
+        if self.held_used:
+            return
+        if self.held_tetromino is None:
+            self.held_tetromino = self.tetromino
+            self.held_tetromino.held = True
+
+            self.next_tetromino.current = True
+            self.tetromino = self.next_tetromino
+            self.next_tetromino = self.new_piece(current=False)
+        else:
+            self.held_tetromino, self.tetromino = self.tetromino, self.held_tetromino
+            self.held_tetromino.held = True
+            self.held_tetromino.current = False
+            self.tetromino.held = False
+            self.tetromino.current = True
+            self.tetromino.reset_position()
+
+        self.held_used = True
+
+    def control(self, action):
+        if action[0] == 1:  # Move left
+            self.tetromino.move(direction='left')
+        if action[1] == 1:  # Move right
+            self.tetromino.move(direction='right')
+        if action[2] == 1:  # Rotate
+            self.tetromino.rotate()
+        if action[3] == 1:  # Speed up
+            self.speed_up = True
+        if action[4] == 1:  # Hold
+            self.hold_tetromino()
+
+    def chceck_full_rows(self):
+        # Ta sama kompaktacja co w Tetris.chceck_full_rows (łącznie z górnymi wierszami)
+        full_rows = self.board.full_rows()
+        if not full_rows:
+            return 0
+
+        row = FIELD_H - 1
+        lines_cleared = 0
+        for y in range(FIELD_H - 1, -1, -1):
+            self.field_array[row][:] = self.field_array[y]
+
+            if y not in full_rows:
+                row -= 1
+            else:
+                self.field_array[row][:] = [0] * FIELD_W
+                lines_cleared += 1
+        self.board.clear_full_rows()
+        self.stats.mark_dirty()
+        self.full_lines += lines_cleared
+        return lines_cleared
+
+    def clear_lines(self):
+        x = self.chceck_full_rows()
+        match x:
+            case 1:
+                self.reward += 2000000
+            case 2:
+                self.reward += 4000000
+            case 3:
+                self.reward += 8000000
+            case 4:
+                self.reward += 15000000
+
+    def drop(self):
+        # Twarde opuszczenie: klocek spada do końca, blokuje się, a pełne wiersze znikają od razu
+        self.tetromino.hard_drop()
+        self.chceck_tetromino_landing()
+        self.clear_lines()
+        self.get_score()
+
+    def place(self, placement):
+        # Ustawienie klocka od razu w wybranej pozycji końcowej (placement.enumerate_placements)
+        if placement.hold:
+            self.hold_tetromino()
+        self.tetromino.blocks = list(placement.blocks)
+        self.tetromino.rotation = placement.rotation
+        self.drop()
+
+    def simulate(self, placement):
+        # Kopia gry z zastosowanym placement - do oceny planszy wynikowej bez zmiany tej gry
+        clone = copy.copy(self)
+        clone.pieces = self.pieces.copy()
+        clone.field_array = [row[:] for row in self.field_array]
+        clone.board = self.board.copy()
+        clone.stats = BoardStats(clone.board)
+        for name in ('tetromino', 'next_tetromino', 'held_tetromino'):
+            piece = getattr(self, name)
+            if piece is not None:
+                piece = copy.copy(piece)
+                piece.tetris = clone
+            setattr(clone, name, piece)
+        clone.place(placement)
+        return clone
+
+    def fall(self):
+        self.clear_lines()
+        self.tetromino.update()
+        self.chceck_tetromino_landing()
+        self.get_score()
+
+    def update(self, trigger=True):
+        if trigger:
+            self.fall()
+
+        if self.gameover:
+            self.reward += self.analyze_field_after_game_over()
+            self.reward -= 50  # Ograniczona kara za przegraną
+
+        return self.score, self.gameover, self.reward
+
+    def analyze_field_after_game_over(self):
+        reward = 0
+        level_rewards = [50, 50, 50, 50, 40, 30, 20, 10, 50]
+
+        # Nagroda za bloki w poziomach (jak w Tetris.analyze_field_after_game_over)
+        for y in range(FIELD_H):
+            blocks = sum(map(bool, self.field_array[y]))
+            if y < len(level_rewards):
+                reward += level_rewards[y] * blocks
+            else:
+                reward += max(-1, -(y - 9) * 10) * blocks
+
+        holes = self.count_holes()
+        if holes > 5:
+            reward -= (100 * holes)  # Kara za otwory
+
+        filled_levels = sum(1 for y in range(FIELD_H) if all(self.field_array[y]))
+        if filled_levels > 7:
+            reward += filled_levels * FIELD_W * 100
+        elif filled_levels < 4:
+            reward -= (4 - filled_levels) * 200
+
+        return reward
+
+
+class TickClock:
+    # Logiczny zegar gry zamiast timerów pygame: 1 tick = FAST_ANIMATION ms czasu gry
+    def __init__(self, ticks_per_step=GRAVITY_TICKS, gravity_ticks=GRAVITY_TICKS,
+                 fast_gravity_ticks=1, instant_drop=False):
+        self.ticks_per_step = ticks_per_step
+        self.gravity_ticks = gravity_ticks
+        self.fast_gravity_ticks = fast_gravity_ticks
+        self.instant_drop = instant_drop
+        self.ticks = 0
+
+    def reset(self):
+        self.ticks = 0
+
+    def advance(self):
+        start = self.ticks
+        self.ticks += self.ticks_per_step
+        return range(start + 1, self.ticks + 1)
+
+    def is_trigger(self, tick, speed_up=False):
+        return tick % (self.fast_gravity_ticks if speed_up else self.gravity_ticks) == 0
+
+
+class HeadlessApp:
+    # Odpowiednik AppAi bez okna, zdarzeń i rysowania
+    def __init__(self, seed=None, clock=None, profiler=None, piece_mode=UNIFORM, sequence=None, control_repeats=2):
+        self.tetris = TetrisEngine(seed, piece_mode, sequence)
+        # AppAi.play_step stosuje akcję dwa razy (w chceck_events i ponownie w play_step), model.pth był uczony
+        # z tym podwójnym ruchem - domyślnie tak samo; control_repeats=1 to jeden ruch na krok
+        self.control_repeats = control_repeats
+        self.clock = clock or TickClock()
+        self.profiler = profiler or NULL_PROFILER
+
+    def play_step(self, action=None):
+        with self.profiler.phase('play_step/control'):
+            if action is not None:
+                for _ in range(self.control_repeats):
+                    self.tetris.control(action)
+
+        with self.profiler.phase('play_step/update'):
+            if self.clock.instant_drop:
+                self.tetris.drop()
+            else:
+                for tick in self.clock.advance():
+                    if self.tetris.gameover:
+                        break
+                    if self.clock.is_trigger(tick, self.tetris.speed_up):
+                        self.tetris.fall()
+
+            score, gameover, reward = self.tetris.update(trigger=False)
+        return reward, gameover, score
+
+    def play_placement(self, placement):
+        # Jedna decyzja na klocek zamiast akcji co klatkę
+        self.tetris.place(placement)
+        score, gameover, reward = self.tetris.update(trigger=False)
+        return reward, gameover, score
@@ -0,0 +1,123 @@
+import numpy as np
+from constants import *
+
+# Wektorowy odpowiednik Agent.get_state: ten sam układ 245 cech, liczony na tablicach NumPy
+# i zapisywany do prealokowanego bufora float32 (albo prosto do wiersza batcha)
+
+SHAPE_INDEX = {'T': 0, 'O': 1, 'J': 2, 'L': 3, 'I': 4, 'S': 5, 'Z': 6}
+
+CELLS = FIELD_W * FIELD_H
+HEIGHTS = CELLS
+BUMPINESS = HEIGHTS + FIELD_W
+HOLES = BUMPINESS + 1
+HOLES_RATIO = HOLES + 1
+MAX_HEIGHT = HOLES_RATIO + 1
+HEIGHT_RANGE = MAX_HEIGHT + 1
+BLOCKS_BELOW_SIX = HEIGHT_RANGE + 1
+POSITION = BLOCKS_BELOW_SIX + 1
+SHAPE = POSITION + 2
+NEXT_SHAPE = SHAPE + 7
+ALMOST_FULL = NEXT_SHAPE + 7
+HIGHEST_POINT = ALMOST_FULL + FIELD_W - 1
+MOVE_OPTIONS = HIGHEST_POINT + 1
+AVG_HEIGHT = MOVE_OPTIONS + 1
+FREE_SPACES = AVG_HEIGHT + 1
+FEATURE_SIZE = FREE_SPACES + 1
+
+COLUMNS = np.arange(FIELD_W)
+DIAGONALS = np.array([(-1, -1), (-1, 1), (1, -1), (1, 1)])
+DIAGONAL_LIST = DIAGONALS.tolist()
+
+
+class FeatureBuilder:
+    def __init__(self, capacity=64):
+        self.buffer = np.empty((capacity, FEATURE_SIZE), dtype=np.float32)
+
+    def __call__(self, tetris, out=None):
+        # Jedna plansza: cechy planszy z przyrostowych BoardStats i masek bitowych (tańsze niż batch dla N=1).
+        # Bez `out` wynik trafia do wewnętrznego bufora.
+        out = self.buffer[0] if out is None else out
+        stats = tetris.stats.refresh()
+        rows = np.fromiter(tetris.board.rows, dtype=np.int64, count=FIELD_H)
+        filled = (rows[:, None] >> COLUMNS & 1).astype(np.bool_)
+        out[:CELLS] = filled.ravel()
+        out[HEIGHTS:BUMPINESS] = stats.col_heights
+        avg_height = stats.avg_height
+        out[BUMPINESS:POSITION] = (stats.bumpiness, stats.holes, stats.holes / avg_height if avg_height > 0 else 0,
+                                   stats.max_height, stats.max_height - stats.min_height, stats.blocks_below_six)
+        out[ALMOST_FULL:HIGHEST_POINT] = stats.almost_full_rows
+        out[HIGHEST_POINT] = stats.highest_point
+        out[AVG_HEIGHT] = avg_height
+
+        current = tetris.tetromino
+        x, y = int(current.pos.x), int(current.pos.y)
+        out[POSITION] = x
+        out[POSITION + 1] = y
+        out[SHAPE:ALMOST_FULL] = 0
+        out[SHAPE + SHAPE_INDEX.get(current.shape, -1) % 7] = 1
+        next_shape = SHAPE_INDEX.get(getattr(tetris.next_tetromino, 'shape', None))
+        if next_shape is not None:
+            out[NEXT_SHAPE + next_shape] = 1
+
+        out[MOVE_OPTIONS] = tetris.board.move_options(current.cells())
+
+        rows = tetris.board.rows
+        out[FREE_SPACES] = sum(1 for dx, dy in DIAGONAL_LIST
+                               if 0 <= x + dx < FIELD_W and 0 <= y + dy < FIELD_H and not rows[y + dy] >> x + dx & 1)
+        return out
+
+    def batch(self, tetrises, out=None):
+        # N plansz naraz: każda cecha to jedna operacja na tablicach (N, ...)
+        n = len(tetrises)
+        if out is None:
+            if len(self.buffer) < n:
+                self.buffer = np.empty((n, FEATURE_SIZE), dtype=np.float32)
+            out = self.buffer[:n]
+        rows = np.array([tetris.board.rows for tetris in tetrises], dtype=np.int64)
+        filled = (rows[:, :, None] >> COLUMNS & 1).astype(np.bool_)
+        out[:, :CELLS] = filled.reshape(n, CELLS)
+
+        # Wysokości kolumn, wyboistość, dziury (jak Bitboard.holes) i statystyki wierszy
+        heights = np.where(filled.any(axis=1), FIELD_H - filled.argmax(axis=1), 0)
+        out[:, HEIGHTS:BUMPINESS] = heights
+        out[:, BUMPINESS] = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+
+        above = np.logical_or.accumulate(filled, axis=1)
+        below2 = np.ones((n, FIELD_H - 1, FIELD_W), dtype=np.bool_)
+        below2[:, :-1] = filled[:, 2:]
+        holes = (~filled[:, 1:-1] & above[:, :-2] & filled[:, 2:] & below2[:, 1:]).sum(axis=(1, 2))
+        avg_height = heights.sum(axis=1) / FIELD_W
+        out[:, HOLES] = holes
+        out[:, HOLES_RATIO] = np.divide(holes, avg_height, out=np.zeros(n), where=avg_height > 0)
+        out[:, MAX_HEIGHT] = heights.max(axis=1)
+        out[:, HEIGHT_RANGE] = heights.max(axis=1) - heights.min(axis=1)
+        out[:, AVG_HEIGHT] = avg_height
+
+        counts = filled.sum(axis=2)
+        out[:, BLOCKS_BELOW_SIX] = counts[:, 6:].sum(axis=1)
+        partial = (counts[:, :, None] == COLUMNS[1:]).sum(axis=1)  # wiersze z 1..FIELD_W-1 blokami
+        out[:, ALMOST_FULL:HIGHEST_POINT] = partial
+        nonempty = counts > 0
+        out[:, HIGHEST_POINT] = np.where(nonempty.any(axis=1), nonempty.argmax(axis=1), FIELD_H)
+
+        # Klocki: pozycja, kształty (one-hot; nieznany następny - same zera)
+        pieces = [tetris.tetromino for tetris in tetrises]
+        position = np.array([(int(piece.pos.x), int(piece.pos.y)) for piece in pieces])
+        out[:, POSITION:SHAPE] = position
+        out[:, SHAPE:ALMOST_FULL] = 0
+        index = np.arange(n)
+        out[index, SHAPE + np.array([SHAPE_INDEX.get(piece.shape, -1) % 7 for piece in pieces])] = 1
+        next_shapes = [SHAPE_INDEX.get(getattr(tetris.next_tetromino, 'shape', None)) for tetris in tetrises]
+        known = [i for i, shape in enumerate(next_shapes) if shape is not None]
+        out[known, NEXT_SHAPE + np.array([next_shapes[i] for i in known], dtype=np.int64)] = 1
+
+        # Przesunięcia w poziomie bez kolizji (jak can_move(dx, 0) dla dx w [-FIELD_W, FIELD_W))
+        out[:, MOVE_OPTIONS] = [tetris.board.move_options(piece.cells()) for tetris, piece in zip(tetrises, pieces)]
+
+        # Puste pola na ukos od pozycji klocka
+        nx = position[:, 0, None] + DIAGONALS[:, 0]
+        ny = position[:, 1, None] + DIAGONALS[:, 1]
+        inside = (nx >= 0) & (nx < FIELD_W) & (ny >= 0) & (ny < FIELD_H)
+        empty = ~filled[index[:, None], ny.clip(0, FIELD_H - 1), nx.clip(0, FIELD_W - 1)]
+        out[:, FREE_SPACES] = (inside & empty).sum(axis=1)
+        return out
@@ -1,9 +1,129 @@
-import matplotlib.pyplot as plt
-from IPython import display
+import csv
+import os
+import queue
+import threading
+import time
+import multiprocessing as mp
+
+# Wykres postępu treningu rysowany w tle: okno matplotlib w osobnym procesie albo (headless)
+# wątek zapisujący scores.csv i scores.png. Importy matplotlib/IPython dopiero przy rysowaniu.
+
+RESET = 'reset'
+
+
+def downsample(values, max_points):
+    # Równomiernie wybrane punkty (zawsze z ostatnim), żeby koszt rysowania nie rósł z historią
+    if len(values) <= max_points:
+        return list(range(len(values))), values
+    step = (len(values) - 1) / (max_points - 1)
+    xs = [round(i * step) for i in range(max_points)]
+    return xs, [values[x] for x in xs]
+
+
+def draw(ax, scores, avg_scores, max_points):
+    ax.set_title('Training...')
+    ax.set_xlabel('Number of Games')
+    ax.set_ylabel('Score')
+    ax.plot(*downsample(scores, max_points))
+    ax.plot(*downsample(avg_scores, max_points))
+    ax.set_ylim(ymin=0)
+    ax.text(len(scores) - 1, scores[-1], str(scores[-1]))
+    ax.text(len(avg_scores) - 1, avg_scores[-1], str(avg_scores[-1]))
+
+
+def save_png(scores, avg_scores, path, max_points):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    draw(figure.add_subplot(), scores, avg_scores, max_points)
+    tmp_path = path + '.tmp.png'
+    figure.savefig(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def plot_worker(messages, out_dir=None, interval=1.0, max_points=1000):
+    # Zbiera wyniki z kolejki i odświeża wykres najwyżej raz na `interval` sekund
+    scores = []
+    avg_scores = []
+    csv_file = writer = plt = None
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        csv_file = open(os.path.join(out_dir, 'scores.csv'), 'w', newline='')
+        writer = csv.writer(csv_file)
+        writer.writerow(['game', 'score', 'mean_score'])
+    else:
+        import matplotlib.pyplot as plt
+        plt.ion()
+
+    last_draw = 0
+    dirty = False
+    running = True
+    while running:
+        try:
+            message = messages.get(timeout=interval)
+        except queue.Empty:
+            message = None
+        else:
+            if message is None:
+                running = False
+            elif message == RESET:
+                scores, avg_scores = [], []
+            else:
+                scores.append(message[0])
+                avg_scores.append(message[1])
+                if writer:
+                    writer.writerow([len(scores), *message])
+                dirty = True
+
+        if dirty and (not running or time.monotonic() - last_draw >= interval):
+            if out_dir:
+                csv_file.flush()
+                save_png(scores, avg_scores, os.path.join(out_dir, 'scores.png'), max_points)
+            else:
+                plt.clf()
+                draw(plt.gca(), scores, avg_scores, max_points)
+                plt.show(block=False)
+            last_draw = time.monotonic()
+            dirty = False
+        if plt is not None:
+            plt.pause(.001)  # Obsługa zdarzeń okna
+
+    if csv_file:
+        csv_file.close()
+
+
+class Plotter:
+    # out_dir=None: okno w procesie potomnym; out_dir='ścieżka': tryb headless (CSV/PNG) w wątku
+    def __init__(self, out_dir=None, interval=1.0, max_points=1000):
+        args = (out_dir, interval, max_points)
+        if out_dir:
+            self.messages = queue.Queue()
+            self.worker = threading.Thread(target=plot_worker, args=(self.messages, *args), daemon=True)
+        else:
+            context = mp.get_context('spawn')
+            self.messages = context.Queue()
+            self.worker = context.Process(target=plot_worker, args=(self.messages, *args), daemon=True)
+        self.worker.start()
+
+    def add(self, score, mean_score):
+        self.messages.put((score, mean_score))
+
+    def reset(self):
+        self.messages.put(RESET)
+
+    def close(self):
+        self.messages.put(None)
+        self.worker.join(timeout=10)
 
-plt.ion()
 
 def plot(scores, avg_scores):
+    # Rysowanie synchroniczne (np. w notebooku)
+    import matplotlib.pyplot as plt
+    from IPython import display
+
+    plt.ion()
     display.clear_output(wait=True)
     display.display(plt.gcf())
     plt.clf()
@@ -16,4 +136,4 @@ def plot(scores, avg_scores):
     plt.text(len(scores)-1, scores[-1], str(scores[-1]))
     plt.text(len(avg_scores)-1, avg_scores[-1], str(avg_scores[-1]))
     plt.show(block=False)
-    plt.pause(.1)
\ No newline at end of file
+    plt.pause(.1)
@@ -1,19 +1,28 @@
 import sys
 import pygame as pg
 from settings import *
-from tetris import Tetris, Text
+from tetris import Tetris, Text, draw_grid
 import pathlib
 
 class AppAi:
-    def __init__(self):
+    def __init__(self, tick_clock=None, pieces=None, render_every=1):
         pg.init()
         pg.display.set_caption('Tetris')
         self.screen = pg.display.set_mode(WIN_RES)
         self.clock = pg.time.Clock()
+        self.tick_clock = tick_clock
         self.set_timer()
         self.img = self.load_img()
-        self.tetris = Tetris(self)
+        self.tetris = Tetris(self, pieces)
         self.text = Text(self)
+        self.init_rendering(render_every)
+
+    def init_rendering(self, render_every=1):
+        # render_every=N: rysowanie co N kroków gry (podgląd treningu bez pełnego kosztu co krok)
+        self.render_every = render_every
+        self.steps = 0
+        self.background = None
+        self.dirty = []
 
     def load_img(self):
         files = [item for item in pathlib.Path(SPRITE_DIR).rglob("*.png") if item.is_file()]
@@ -26,6 +35,8 @@ class AppAi:
         self.fast_user_event = pg.USEREVENT + 1
         self.anim_trigger = False
         self.fast_anim_trigger = False
+        if self.tick_clock is not None:
+            return  # Grawitacja z logicznego zegara (engine.TickClock), nie z czasu rzeczywistego
         pg.time.set_timer(self.user_event, ANIMATION_TIME)
         pg.time.set_timer(self.fast_user_event, FAST_ANIMATION)
 
@@ -37,16 +48,62 @@ class AppAi:
     def play_step(self, action= None):
         self.chceck_events(action)
         self.tetris.control(action)
-        score, gameover, reward = self.tetris.update()
-        self.draw()
+        if self.tick_clock is None:
+            score, gameover, reward = self.tetris.update()
+        else:
+            self.advance_clock()
+            score, gameover, reward = self.tetris.update(trigger=False)
+        self.render()
         return reward, gameover, score
 
+    def advance_clock(self):
+        # Jak HeadlessApp.play_step: grawitacja na każdym ticku zegara albo twarde opuszczenie
+        if self.tick_clock.instant_drop:
+            self.tetris.drop()
+            return
+        for tick in self.tick_clock.advance():
+            if self.tetris.gameover:
+                break
+            if self.tick_clock.is_trigger(tick, self.tetris.speed_up):
+                self.tetris.fall()
+
+    def render(self):
+        self.steps += 1
+        if self.steps % self.render_every == 0:
+            self.draw()
+
+    def render_background(self):
+        # Warstwa statyczna: tło, pole gry z siatką i stałe napisy - rysowana raz
+        background = pg.Surface(WIN_RES).convert()
+        background.fill(color=BG_COLOR)
+        background.fill(color=FIELD_COLOR, rect=(FIELD_OFFSET_X,0, *FIELD_RES))
+        draw_grid(background)
+        self.text.draw_static(background)
+        return background
+
     def draw(self):
-        self.screen.fill(color=BG_COLOR)
-        self.screen.fill(color=FIELD_COLOR, rect=(FIELD_OFFSET_X,0, *FIELD_RES))
-        self.tetris.draw()
-        self.text.draw()
-        pg.display.flip()
+        # Odświeżane są tylko prostokąty klocków z poprzedniej i bieżącej klatki oraz wynik po zmianie
+        if self.background is None:
+            self.background = self.render_background()
+            self.screen.blit(self.background, (0, 0))
+            self.text.invalidate()
+            self.dirty = []
+            full_redraw = True
+        else:
+            for rect in self.dirty:
+                self.screen.blit(self.background, rect, rect)
+            full_redraw = False
+
+        rects = self.draw_pieces()
+        score_rects = self.text.draw_score(self.background)
+        if full_redraw:
+            pg.display.flip()
+        else:
+            pg.display.update(self.dirty + rects + score_rects)
+        self.dirty = rects
+
+    def draw_pieces(self):
+        return self.tetris.draw()
 
     def chceck_events(self, action= None):
         self.anim_trigger = False
@@ -68,12 +125,71 @@ class AppAi:
         while True:
             action = None
             reward, gameover, score = self.play_step(action)
-            self.draw()
             if gameover:
                 self.tetris.reset()
-            self.draw()
 
 
+class WatchApp(AppAi):
+    # Podgląd gry z silnika bez pygame (engine.HeadlessApp) - rysowany tylko gdy oglądamy
+    def __init__(self, game, render_every=1):
+        pg.init()
+        pg.display.set_caption('Tetris')
+        self.screen = pg.display.set_mode(WIN_RES)
+        self.clock = pg.time.Clock()
+        self.img = self.load_img()
+        self.game = game
+        self.text = Text(self)
+        self.init_rendering(render_every)
+
+    @property
+    def tetris(self):
+        return self.game.tetris
+
+    @property
+    def profiler(self):
+        return self.game.profiler
+
+    def play_step(self, action=None):
+        with self.profiler.phase('play_step/events'):
+            self.chceck_events()
+        reward, gameover, score = self.game.play_step(action)
+        with self.profiler.phase('play_step/draw'):
+            self.render()
+        return reward, gameover, score
+
+    def play_placement(self, placement):
+        self.chceck_events()
+        reward, gameover, score = self.game.play_placement(placement)
+        self.render()
+        return reward, gameover, score
+
+    def chceck_events(self, action=None):
+        for event in pg.event.get():
+            if event.type == pg.QUIT or (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
+                pg.quit()
+                sys.exit()
+
+    def draw_cell(self, color, pos, offset_x=FIELD_OFFSET_X):
+        image = self.img[(color - 1) % len(self.img)]
+        return self.screen.blit(image, (pos[0] * TILE_SIZE + offset_x, pos[1] * TILE_SIZE))
+
+    def draw_pieces(self):
+        tetris = self.tetris
+        rects = []
+        for y, row in enumerate(tetris.field_array):
+            for x, cell in enumerate(row):
+                if cell:
+                    rects.append(self.draw_cell(cell, (x, y)))
+
+        for pos in tetris.tetromino.blocks:
+            rects.append(self.draw_cell(tetris.tetromino.color, pos))
+        for pos in TETROMINOES[tetris.next_tetromino.shape]:
+            rects.append(self.draw_cell(tetris.next_tetromino.color, vec(pos) + NEXT_POS_OFFSET))
+        if tetris.held_tetromino is not None:
+            for pos in TETROMINOES[tetris.held_tetromino.shape]:
+                rects.append(self.draw_cell(tetris.held_tetromino.color, vec(pos) + HELD_POS_OFFSET, offset_x=0))
+        return rects
+
 if __name__ == '__main__':
     app = AppAi()
     app.run()
\ No newline at end of file
@@ -2,7 +2,10 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
+import numpy as np
+import copy
 import os
+import warnings
 
 class Linear_QNet(nn.Module):
     def __init__(self, input_size, hidden_size1, hidden_size2, output_size):
@@ -17,6 +20,29 @@ class Linear_QNet(nn.Module):
         x = self.linear3(x)
         return x
 
+    def inference(self, backend=None):
+        # Ścieżka do wybierania akcji; backend=None dzieli wagi z tym modelem (widzi kolejne kroki uczenia)
+        return InferenceModel(self, backend)
+
+    def numpy_weights(self):
+        # Wagi w układzie numpy_policy.NumpyQNet: (in, out) float32, gotowe do x @ w + b
+        weights = {}
+        for name, layer in (('linear1', self.linear1), ('linear2', self.linear2), ('linear3', self.linear3)):
+            weights[f'{name}.weight'] = layer.weight.detach().cpu().numpy().T.astype(np.float32, order='C')
+            weights[f'{name}.bias'] = layer.bias.detach().cpu().numpy().astype(np.float32)
+        return weights
+
+    def export(self, file_name='model.npz'):
+        # Eksport do .npz (bez kompresji) dla procesów grających bez torcha
+        model_folder_path = './model'
+        os.makedirs(model_folder_path, exist_ok=True)
+        file_path = os.path.join(model_folder_path, file_name)
+        tmp_path = file_path + '.tmp.npz'
+        np.savez(tmp_path, **self.numpy_weights())
+        os.replace(tmp_path, file_path)
+        print(f"✅ Model exported to {file_path}")
+        return file_path
+
     def save(self, file_name='model.pth'):
         model_folder_path = './model'
         if not os.path.exists(model_folder_path):
@@ -35,39 +61,115 @@ class Linear_QNet(nn.Module):
             print("⚠️ No saved model found. Starting fresh.")
 
 
+class InferenceModel:
+    # Forward bez autograda (inference_mode) na stałym buforze wejścia float32 (pinned, gdy jest CUDA).
+    # backend='script' - kopia skompilowana TorchScriptem, 'int8' - kopia z dynamiczną kwantyzacją warstw Linear.
+    def __init__(self, model, backend=None):
+        self.buffer = torch.empty((1, model.linear1.in_features), dtype=torch.float32,
+                                  pin_memory=torch.cuda.is_available())
+        self.array = self.buffer.numpy()
+        if backend not in (None, 'script', 'int8'):
+            raise ValueError(f'Unknown inference backend: {backend}')
+        self.module = model
+        with warnings.catch_warnings():  # oba API są w nowszym torchu oznaczone jako przestarzałe
+            warnings.simplefilter('ignore')
+            if backend == 'script':
+                self.module = torch.jit.script(copy.deepcopy(model).eval())
+            elif backend == 'int8':
+                self.module = torch.ao.quantization.quantize_dynamic(copy.deepcopy(model).eval(), {nn.Linear},
+                                                                     dtype=torch.qint8)
+
+    def predict(self, state):
+        # Jeden stan (in,) przez bufor, batch (N, in) bezpośrednio z tablicy
+        with torch.inference_mode():
+            if np.ndim(state) == 1:
+                self.array[0] = state
+                return self.module(self.buffer)[0]
+            return self.module(torch.as_tensor(np.asarray(state, dtype=np.float32)))
+
+    def act(self, state):
+        return int(self.predict(state).argmax())
+
+
 class QTrainer:
-    def __init__(self, model, lr, gamma):
+    def __init__(self, model, lr, gamma, load=True, target_sync=None, tau=None):
         self.lr = lr
         self.gamma = gamma
         self.model = model
         self.optimizer = optim.Adam(model.parameters(), lr=self.lr)
         self.criterion = nn.MSELoss()
-        self.model.load()
+        if load:  # Population wczytuje wagi raz i kopiuje je do agentów (checkpoint.load_model_weights)
+            self.model.load()
+
+        # Sieć docelowa: kopiowana co target_sync kroków albo uśredniana (Polyak) z wagą tau po każdym kroku
+        self.target_sync = target_sync
+        self.tau = tau
+        self.steps = 0
+        self.target_model = None
+        if target_sync or tau:
+            self.target_model = copy.deepcopy(model)
+            self.target_model.requires_grad_(False)
+
+    def sync_target(self, tau=None):
+        if self.target_model is None:
+            return
+        with torch.no_grad():
+            for target, source in zip(self.target_model.parameters(), self.model.parameters()):
+                if tau is None:
+                    target.copy_(source)
+                else:
+                    target.lerp_(source, tau)
+
+    @staticmethod
+    def as_tensor(value, dtype):
+        # Gotowe tensory przechodzą bez kopiowania, krotki tablic NumPy są sklejane jednym stackiem
+        if isinstance(value, torch.Tensor):
+            return value.to(dtype)
+        if isinstance(value, (list, tuple)) and value and isinstance(value[0], np.ndarray):
+            value = np.stack(value)
+        return torch.as_tensor(np.asarray(value), dtype=dtype)
 
-    def train_step(self, state, action, reward, next_state, done):
-        state = torch.tensor(state, dtype=torch.float)
-        next_state = torch.tensor(next_state, dtype=torch.float)
-        action = torch.tensor(action, dtype=torch.long)
-        reward = torch.tensor(reward, dtype=torch.float)
+    def train_step(self, state, action, reward, next_state, done, discount=None):
+        # discount: gamma^k dla każdej próbki (zwroty n-krokowe), domyślnie gamma
+        state = self.as_tensor(state, torch.float)
+        next_state = self.as_tensor(next_state, torch.float)
+        action = self.as_tensor(action, torch.long)
+        reward = self.as_tensor(reward, torch.float)
+        done = self.as_tensor(done, torch.bool)
 
         if len(state.shape) == 1:
             state = torch.unsqueeze(state, 0)
             next_state = torch.unsqueeze(next_state, 0)
             action = torch.unsqueeze(action, 0)
             reward = torch.unsqueeze(reward, 0)
-            done = (done,)
+            done = torch.unsqueeze(done, 0)
+
+        # Akcje jako one-hot (N, 5) albo indeksy (N,)
+        if len(action.shape) == 2:
+            action = torch.argmax(action, dim=1)
 
         pred = self.model(state)
 
-        target = pred.clone()
-        for idx in range(len(done)):
-            Q_new = reward[idx]
-            if not done[idx]:
-                Q_new = reward[idx] + self.gamma * torch.max(self.model(next_state[idx]))
+        if discount is None:
+            discount = self.gamma
+        else:
+            discount = self.as_tensor(discount, torch.float).reshape(reward.shape)
+
+        bootstrap = self.target_model if self.target_model is not None else self.model
+        with torch.no_grad():
+            next_q = bootstrap(next_state).max(dim=1).values
+            q_new = reward + discount * next_q * (~done)
 
-            target[idx][torch.argmax(action[idx]).item()] = Q_new
+        target = pred.detach().clone()
+        target.scatter_(1, action.unsqueeze(1), q_new.unsqueeze(1))
 
         self.optimizer.zero_grad()
         loss = self.criterion(target, pred)
         loss.backward()
         self.optimizer.step()
+
+        self.steps += 1
+        if self.tau:
+            self.sync_target(self.tau)
+        elif self.target_sync and self.steps % self.target_sync == 0:
+            self.sync_target()
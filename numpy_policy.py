@@ -0,0 +1,106 @@
+import pickle
+import random
+import subprocess
+import sys
+import numpy as np
+from engine import HeadlessApp
+from features import FeatureBuilder, FEATURE_SIZE
+from pieces import UNIFORM
+
+# Polityka bez torcha: wagi Linear_QNet wyeksportowane do .npz (Linear_QNet.export) i forward w NumPy.
+# Procesy, które tylko grają (ewaluacja, pokaz), nie importują torcha, matplotlib ani pygame.
+
+LAYERS = ('linear1', 'linear2', 'linear3')
+
+
+class NumpyQNet:
+    def __init__(self, weights):
+        # weights: słownik '{warstwa}.weight' (in, out) i '{warstwa}.bias' (out,) w float32
+        self.layers = [(np.ascontiguousarray(weights[f'{name}.weight'], dtype=np.float32),
+                        np.ascontiguousarray(weights[f'{name}.bias'], dtype=np.float32)) for name in LAYERS]
+
+    @classmethod
+    def load(cls, path='./model/model.npz'):
+        with np.load(path) as weights:
+            return cls(weights)
+
+    def forward(self, x):
+        for i, (w, b) in enumerate(self.layers):
+            x = x @ w + b
+            if i < len(self.layers) - 1:
+                np.maximum(x, 0, out=x)
+        return x
+
+    def act(self, state):
+        return int(self.forward(state).argmax())
+
+
+def play_games(args):
+    # Odpowiednik population.play_games na NumPy: te same ziarna i ten sam epsilon co Agent.get_action
+    weights, number_of_games, seeds, piece_mode = args
+    model = NumpyQNet(weights)
+    features = FeatureBuilder()
+    state = np.empty(FEATURE_SIZE, dtype=np.float32)
+    epsilon = max(5, 50 - number_of_games)
+    actions = np.eye(5, dtype=np.int64).tolist()
+
+    scores = []
+    for seed in seeds:
+        random.seed(seed)
+        game = HeadlessApp(seed, piece_mode=piece_mode or UNIFORM)
+        score = 0
+        while not game.tetris.gameover:
+            if random.randint(0, 200) < epsilon:
+                move = random.randint(0, 4)
+            else:
+                move = model.act(features(game.tetris, state))
+            reward, game_over, score = game.play_step(actions[move])
+        scores.append(score)
+
+    return sum(scores) / len(scores)
+
+
+class NumpyPool:
+    # Procesy robocze uruchamiane jako `python numpy_policy.py`, a nie przez multiprocessing: spawn importuje
+    # w każdym procesie __main__ rodzica (population.py/agent.py), a z nim torcha.
+    # Zadania i wyniki przesyłane pickle przez stdin/stdout; API jak Pool.map/close/join.
+    def __init__(self, workers):
+        self.processes = [subprocess.Popen([sys.executable, __file__], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                          for _ in range(workers)]
+
+    def map(self, fn, jobs):
+        # fn tylko dla zgodności z Pool.map - procesy wykonują zawsze play_games
+        jobs = list(jobs)
+        n = len(self.processes)
+        for i, process in enumerate(self.processes):
+            pickle.dump(jobs[i::n], process.stdin)
+            process.stdin.flush()
+        results = [None] * len(jobs)
+        for i, process in enumerate(self.processes):
+            results[i::n] = pickle.load(process.stdout)
+        return results
+
+    def close(self):
+        for process in self.processes:
+            process.stdin.close()
+
+    def join(self):
+        for process in self.processes:
+            process.wait()
+
+
+def serve():
+    # Pętla procesu roboczego NumpyPool; print z gry idzie na stderr, stdout jest zarezerwowany na wyniki
+    jobs_in, results_out = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr
+    while True:
+        try:
+            jobs = pickle.load(jobs_in)
+        except EOFError:
+            return
+        pickle.dump([play_games(job) for job in jobs], results_out)
+        results_out.flush()
+
+
+if __name__ == '__main__':
+    serve()
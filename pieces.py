@@ -0,0 +1,57 @@
+import random
+from collections import deque
+import numpy as np
+from constants import *
+
+# Źródło kolejnych kształtów klocków dla jednej gry: własny generator z ziarnem (powtarzalne sekwencje),
+# tryb 'uniform' (niezależne losowanie każdego klocka) albo '7bag' (permutacje wszystkich 7 kształtów)
+
+SHAPES = list(TETROMINOES.keys())
+UNIFORM = 'uniform'
+BAG = '7bag'
+
+
+class PieceSource:
+    def __init__(self, seed=None, mode=UNIFORM, sequence=None):
+        # sequence: gotowa tablica indeksów kształtów (np. z generate_sequence) odtwarzana na początku gry
+        if mode not in (UNIFORM, BAG):
+            raise ValueError(f'Unknown piece mode: {mode}')
+        self.seed = seed
+        self.mode = mode
+        self.rng = random.Random(seed)
+        self.queue = deque(SHAPES[i] for i in sequence) if sequence is not None else deque()
+
+    def refill(self):
+        if self.mode == BAG:
+            self.queue.extend(self.rng.sample(SHAPES, len(SHAPES)))
+        else:
+            self.queue.append(self.rng.choice(SHAPES))
+
+    def next(self):
+        if not self.queue:
+            self.refill()
+        return self.queue.popleft()
+
+    def peek(self, n=0):
+        # Kształt n-ty z kolei, bez zużywania go
+        while len(self.queue) <= n:
+            self.refill()
+        return self.queue[n]
+
+    def copy(self):
+        source = PieceSource.__new__(PieceSource)
+        source.seed = self.seed
+        source.mode = self.mode
+        source.rng = random.Random()
+        source.rng.setstate(self.rng.getstate())
+        source.queue = self.queue.copy()
+        return source
+
+    def generate(self, n):
+        # Następne n kształtów jako tablica indeksów (int8), bez zmiany stanu tego źródła
+        source = self.copy()
+        return np.array([SHAPES.index(source.next()) for _ in range(n)], dtype=np.int8)
+
+
+def generate_sequence(seed, n, mode=UNIFORM):
+    return PieceSource(seed, mode).generate(n)
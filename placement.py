@@ -0,0 +1,47 @@
+from collections import namedtuple
+from constants import *
+from shapes import collides, piece_cells
+
+# Przestrzeń akcji "gdzie położyć klocek": wszystkie osiągalne końcowe pozycje (obrót, kolumna, hold)
+
+Placement = namedtuple('Placement', 'hold rotation x blocks')
+
+
+def piece_placements(board, shape, rotation, x, y, hold=False):
+    # Obrót w miejscu (jak Tetromino.rotate), potem przesuwanie w bok aż do kolizji, potem upadek
+    heights = board.col_heights()
+    placements = []
+    seen = set()
+    for turn in range(1 if shape == 'O' else 4):
+        if turn:
+            if collides(board, shape, (rotation + 1) % 4, x, y):
+                break
+            rotation = (rotation + 1) % 4
+
+        for step in (-1, 1):
+            dx = 0
+            while True:
+                cells = piece_cells(shape, rotation, x + dx, y)
+                distance = board.drop_distance(cells, heights)
+                final = tuple((cx, cy + distance) for cx, cy in cells)
+                key = frozenset(final)
+                if key not in seen:
+                    seen.add(key)
+                    placements.append(Placement(hold, rotation, x + dx, final))
+                if collides(board, shape, rotation, x + dx + step, y):
+                    break
+                dx += step
+    return placements
+
+
+def enumerate_placements(tetris):
+    piece = tetris.tetromino
+    x, y = piece.blocks[0]
+    placements = piece_placements(tetris.board, piece.shape, piece.rotation, int(x), int(y))
+
+    if not tetris.held_used:
+        # Po holdzie aktualny staje się trzymany klocek (od pozycji startowej) albo następny
+        piece = tetris.held_tetromino or tetris.next_tetromino
+        placements += piece_placements(tetris.board, piece.shape, 0, *SPAWN_OFFSET, hold=True)
+
+    return placements
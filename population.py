@@ -1,32 +1,93 @@
 import random
+import multiprocessing as mp
+import numpy_policy
+import numpy as np
 import torch
-from agent import Agent
-from main import AppAi
-from helper import plot
+from agent import Agent, STATE_SIZE
+from model import Linear_QNet
+from features import FeatureBuilder
+from engine import HeadlessApp
+from helper import Plotter
+from checkpoint import load_model_weights
+from pieces import UNIFORM
+
+
+def play_games(args):
+    # Uruchamiane w procesie roboczym: gra bez okna i bez treningu na ustalonych ziarnach
+    state_dict, number_of_games, seeds, piece_mode, inference = args
+    torch.set_num_threads(1)
+    agent = Agent(training=False)
+    agent.model.load_state_dict(state_dict)
+    agent.use_inference(inference)
+    agent.number_of_games = number_of_games
+
+    scores = []
+    for seed in seeds:
+        random.seed(seed)
+        game = HeadlessApp(seed, piece_mode=piece_mode)
+        score = 0
+        while not game.tetris.gameover:
+            action = agent.get_action(agent.get_state(game))
+            reward, game_over, score = game.play_step(action)
+        scores.append(score)
+
+    return sum(scores) / len(scores)
+
 
 class Population:
-    def __init__(self, size):
+    def __init__(self, size, watch=False, workers=None, seeds=(0,), plot_dir=None, piece_mode=UNIFORM, inference=None,
+                 training=True):
         self.size = size
-        self.agents = [Agent() for _ in range(size)]
+        self.watch = watch
+        self.workers = workers
+        # Wszyscy agenci grają na tych samych sekwencjach klocków (ziarna), więc wyniki są porównywalne
+        self.seeds = list(seeds)
+        self.piece_mode = piece_mode
+        # Backend w procesach ewaluacji: None, 'script', 'int8' (InferenceModel) albo 'numpy' (numpy_policy, bez torcha)
+        self.inference = inference
+        # training=False: ocena bez uczenia w trakcie gry (bez pamięci i trenera), wagi zmienia tylko mutacja
+        self.training = training
+        self.pool = None
+        self.plot_dir = plot_dir
+        self.plotter = None
+        # Wagi z dysku wczytywane raz i kopiowane do wszystkich agentów
+        weights = load_model_weights()
+        self.agents = [Agent(load=False, training=training) for _ in range(size)]
+        if weights is not None:
+            for agent in self.agents:
+                agent.model.load_state_dict(weights)
 
     def evaluate(self):
-        plot_scores = []  # Lista wyników do wykresu
-        plot_avg_scores = []  # Lista średnich wyników do wykresu
+        if self.workers:
+            return self.evaluate_parallel()
+
+        if self.plotter is None:
+            self.plotter = Plotter(self.plot_dir)
+        self.plotter.reset()  # Wykres dla bieżącego pokolenia
         total_score = 0  # Całkowita suma wyników
         record = 0  # Najlepszy wynik
 
         scores = []
 
         for agent in self.agents:
-            game = AppAi()
-            score = 0
+            seed_scores = []
+            for seed in self.seeds:
+                game = HeadlessApp(seed, piece_mode=self.piece_mode)
+                if self.watch:
+                    from main import WatchApp
+                    game = WatchApp(game)
+                score = 0
 
-            while not game.tetris.gameover:
-                state = agent.get_state(game)
-                action = agent.get_action(state)
-                reward, game_over, score = game.play_step(action)
-                agent.remember(state, action, reward, agent.get_state(game), game_over)
-                agent.train_short_mem(state, action, reward, agent.get_state(game), game_over)
+                while not game.tetris.gameover:
+                    state = agent.get_state(game)
+                    action = agent.get_action(state)
+                    reward, game_over, score = game.play_step(action)
+                    if self.training:
+                        next_state = agent.get_state(game)
+                        agent.remember(state, action, reward, next_state, game_over)
+                        agent.train_short_mem(state, action, reward, next_state, game_over)
+                seed_scores.append(score)
+            score = sum(seed_scores) / len(seed_scores)
 
             # Sprawdzamy, czy to nowy rekord
             if score > record:
@@ -36,15 +97,42 @@ class Population:
 
             scores.append((score, agent))
 
-            plot_scores.append(score)
             total_score += score
             mean_score = total_score / (agent.number_of_games + 1)  # Uniknięcie dzielenia przez zero
-            plot_avg_scores.append(mean_score)
-
-            plot(plot_scores, plot_avg_scores)
+            self.plotter.add(score, mean_score)
 
         return scores
 
+    def evaluate_parallel(self):
+        if self.pool is None:
+            if self.inference == 'numpy':
+                self.pool = numpy_policy.NumpyPool(self.workers)  # Procesy bez torcha
+            else:
+                self.pool = mp.get_context('spawn').Pool(self.workers)
+
+        if self.inference == 'numpy':
+            jobs = [(agent.model.numpy_weights(), agent.number_of_games, self.seeds, self.piece_mode)
+                    for agent in self.agents]
+            results = self.pool.map(numpy_policy.play_games, jobs)
+        else:
+            jobs = [(agent.model.state_dict(), agent.number_of_games, self.seeds, self.piece_mode, self.inference)
+                    for agent in self.agents]
+            results = self.pool.map(play_games, jobs)
+
+        for agent, score in zip(self.agents, results):
+            print('Game: ', agent.number_of_games, ', Score: ', score, flush=True)
+
+        return list(zip(results, self.agents))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.plotter is not None:
+            self.plotter.close()
+            self.plotter = None
+
     def select_and_mutate(self):
         scores = self.evaluate()
         scores.sort(reverse=True, key=lambda x: x[0])
@@ -52,7 +140,7 @@ class Population:
 
         new_agents = []
         for agent in best_agents:
-            new_agent = Agent()
+            new_agent = Agent(load=False, training=self.training)
             new_agent.model.load_state_dict(agent.model.state_dict())
             self.mutate(new_agent)
             new_agents.append(new_agent)
@@ -64,13 +152,112 @@ class Population:
             if random.random() < 0.2:
                 param.data += torch.randn_like(param) * 0.1
 
-def train_population():
-    pop = Population(size=10)
+class StackedPopulation:
+    # Cała populacja jako stos wag (P, in, out) warstw Linear_QNet: jeden bmm na krok dla wszystkich plansz,
+    # selekcja i mutacja na całych tensorach, bez obiektów Agent, trenerów i pamięci powtórek
+    def __init__(self, size, seeds=(0,), piece_mode=UNIFORM, sizes=(STATE_SIZE, 650, 650, 5),
+                 mutation_rate=0.2, sigma=0.1):
+        self.size = size
+        self.seeds = list(seeds)
+        self.piece_mode = piece_mode
+        self.mutation_rate = mutation_rate
+        self.sigma = sigma
+        self.features = FeatureBuilder()
+        self.generation = 0
+
+        # Start jak w Population: wszyscy z model.pth, a bez niego - losowa inicjalizacja jak nn.Linear
+        weights = load_model_weights()
+        self.layers = []
+        for i, (fan_in, fan_out) in enumerate(zip(sizes, sizes[1:])):
+            if weights is not None:
+                w = weights[f'linear{i + 1}.weight'].t().expand(size, fan_in, fan_out).clone()
+                b = weights[f'linear{i + 1}.bias'].expand(size, 1, fan_out).clone()
+            else:
+                bound = fan_in ** -0.5
+                w = torch.empty(size, fan_in, fan_out).uniform_(-bound, bound)
+                b = torch.empty(size, 1, fan_out).uniform_(-bound, bound)
+            self.layers.append((w, b))
+
+    def forward(self, x):
+        # x: (P, B, STATE_SIZE) -> (P, B, 5), członek p liczy tylko swoje B plansz
+        for i, (w, b) in enumerate(self.layers):
+            x = torch.baddbmm(b, x, w)
+            if i < len(self.layers) - 1:
+                x = torch.relu(x)
+        return x
+
+    def evaluate(self):
+        # Każdy członek gra na wszystkich ziarnach; plansze (P * S) krokowane razem, akcje zachłanne
+        n_seeds = len(self.seeds)
+        games = [HeadlessApp(seed, piece_mode=self.piece_mode) for _ in range(self.size) for seed in self.seeds]
+        states = np.zeros((len(games), STATE_SIZE), dtype=np.float32)
+        scores = np.zeros(len(games))
+        alive = np.ones(len(games), dtype=np.bool_)
+        actions = np.eye(5, dtype=np.int64).tolist()
+
+        while alive.any():
+            running = np.flatnonzero(alive)
+            for i in running:
+                self.features(games[i].tetris, states[i])
+            with torch.inference_mode():
+                q_values = self.forward(torch.from_numpy(states).view(self.size, n_seeds, STATE_SIZE))
+            moves = q_values.argmax(dim=2).view(-1).numpy()
+            for i in running:
+                reward, game_over, scores[i] = games[i].play_step(actions[moves[i]])
+                if game_over:
+                    alive[i] = False
+
+        return scores.reshape(self.size, n_seeds).mean(axis=1)
+
+    def select_and_mutate(self):
+        scores = self.evaluate()
+        order = torch.from_numpy(np.argsort(-scores, kind='stable'))
+        parents = order[:self.size // 2]
+
+        layers = []
+        for w, b in self.layers:
+            elite_w, elite_b = w[parents], b[parents]
+            # Jak Population.mutate: każdy tensor dziecka z prawdopodobieństwem mutation_rate dostaje szum N(0, sigma)
+            mask_w = (torch.rand(len(parents), 1, 1) < self.mutation_rate) * self.sigma
+            mask_b = (torch.rand(len(parents), 1, 1) < self.mutation_rate) * self.sigma
+            child_w = elite_w + torch.randn_like(elite_w) * mask_w
+            child_b = elite_b + torch.randn_like(elite_b) * mask_b
+            layers.append((torch.cat([elite_w, child_w]), torch.cat([elite_b, child_b])))
+        self.layers = layers
+        self.size = len(layers[0][0])
+        self.generation += 1
+        return scores
+
+    def model(self, member=0):
+        # Zwykły Linear_QNet z wagami jednego członka (np. do zapisu model.pth)
+        w1, w2, w3 = (w for w, _ in self.layers)
+        model = Linear_QNet(w1.shape[1], w1.shape[2], w2.shape[2], w3.shape[2])
+        state = {}
+        for i, (w, b) in enumerate(self.layers):
+            state[f'linear{i + 1}.weight'] = w[member].t().contiguous()
+            state[f'linear{i + 1}.bias'] = b[member, 0].clone()
+        model.load_state_dict(state)
+        return model
+
+
+def train_stacked_population(size=10, generations=50, seeds=(0,), piece_mode=UNIFORM):
+    pop = StackedPopulation(size, seeds, piece_mode)
+    for gen in range(generations):
+        scores = pop.select_and_mutate()
+        print(f'Generation {gen + 1} complete, best: {scores.max()}, mean: {scores.mean():.1f}', flush=True)
+
+    # Po select_and_mutate członek 0 to najlepszy z ostatniej oceny
+    pop.model(0).save()
+    return pop
+
+def train_population(workers=None, seeds=(0,)):
+    pop = Population(size=10, workers=workers, seeds=seeds)
     generations = 50
 
     for gen in range(generations):
         pop.select_and_mutate()
         print(f'Generation {gen+1} complete')
+    pop.close()
 
     best_agent = max(pop.agents, key=lambda agent: agent.number_of_games)
     best_agent.model.save()
@@ -0,0 +1,91 @@
+import json
+import time
+from collections import defaultdict, deque
+
+# Lekkie liczniki czasu faz pętli treningowej; wyłączony profiler zwraca pusty kontekst
+
+
+class NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled=True, report_every=10, window=10, path=None):
+        self.enabled = enabled
+        self.report_every = report_every
+        self.path = path
+        self.games = 0
+        # Sumy bieżącej gry i historia ostatnich `window` gier (średnie kroczące)
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.time_history = defaultdict(lambda: deque(maxlen=window))
+        self.call_history = defaultdict(lambda: deque(maxlen=window))
+
+    def phase(self, name):
+        return Phase(self, name) if self.enabled else NULL_PHASE
+
+    def add(self, name, seconds):
+        self.times[name] += seconds
+        self.calls[name] += 1
+
+    def end_game(self):
+        if not self.enabled:
+            return
+        for name in set(self.time_history) | set(self.times):
+            self.time_history[name].append(self.times.get(name, 0.0))
+            self.call_history[name].append(self.calls.get(name, 0))
+        self.times.clear()
+        self.calls.clear()
+        self.games += 1
+
+        if self.report_every and self.games % self.report_every == 0:
+            self.report()
+            if self.path:
+                self.dump()
+
+    def averages(self):
+        result = {}
+        for name, times in self.time_history.items():
+            total = sum(times)
+            calls = sum(self.call_history[name])
+            result[name] = {'ms_per_game': 1000 * total / len(times),
+                            'calls_per_game': calls / len(times),
+                            'us_per_call': 1e6 * total / calls if calls else 0.0}
+        return result
+
+    def report(self):
+        averages = self.averages()
+        print(f'Profil (średnia z {len(next(iter(self.time_history.values()), ()))} ostatnich gier, gra {self.games}):')
+        for name, avg in sorted(averages.items(), key=lambda item: -item[1]['ms_per_game']):
+            print(f'  {name:<24} {avg["ms_per_game"]:10.1f} ms/grę {avg["calls_per_game"]:10.0f} wywołań '
+                  f'{avg["us_per_call"]:10.1f} us/wywołanie')
+
+    def dump(self, path=None):
+        with open(path or self.path, 'w') as f:
+            json.dump({'games': self.games, 'phases': self.averages()}, f, indent=2)
+
+
+NULL_PROFILER = Profiler(enabled=False)
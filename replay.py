@@ -0,0 +1,138 @@
+import json
+import os
+import numpy as np
+import torch
+
+
+class ReplayBuffer:
+    # Pamięć powtórek w prealokowanych tablicach (opcjonalnie memmap na dysku, żeby przetrwała restart)
+    def __init__(self, capacity, state_size, path=None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.path = path
+        self.position = 0
+        self.size = 0
+
+        shapes = {
+            'states': ((capacity, state_size), np.float32),
+            'next_states': ((capacity, state_size), np.float32),
+            'actions': ((capacity,), np.int8),
+            'rewards': ((capacity,), np.float32),
+            'dones': ((capacity,), np.bool_),
+        }
+        if path is None:
+            for name, (shape, dtype) in shapes.items():
+                setattr(self, name, np.zeros(shape, dtype=dtype))
+        else:
+            self.open_memmap(shapes)
+
+    def open_memmap(self, shapes):
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, 'meta.json')
+        meta = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta['capacity'] != self.capacity or meta['state_size'] != self.state_size:
+                meta = None
+
+        mode = 'r+' if meta is not None else 'w+'
+        for name, (shape, dtype) in shapes.items():
+            array = np.lib.format.open_memmap(os.path.join(self.path, f'{name}.npy'),
+                                              mode=mode, dtype=dtype, shape=None if meta else shape)
+            setattr(self, name, array)
+
+        if meta is not None:
+            self.position, self.size = meta['position'], meta['size']
+            print(f"✅ Replay memory loaded from {self.path} ({self.size} transitions)")
+
+    def flush(self):
+        if self.path is None:
+            return
+        for array in (self.states, self.next_states, self.actions, self.rewards, self.dones):
+            array.flush()
+        meta = {'capacity': self.capacity, 'state_size': self.state_size,
+                'position': self.position, 'size': self.size}
+        tmp_path = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, 'meta.json'))
+
+    def __len__(self):
+        return self.size
+
+    def state_dict(self):
+        # Kopia zapełnionej części bufora jako tensory (do punktu kontrolnego, torch.load z weights_only)
+        n = self.size
+        return {'position': self.position, 'size': n,
+                'arrays': {name: torch.from_numpy(np.array(getattr(self, name)[:n])) for name in
+                           ('states', 'next_states', 'actions', 'rewards', 'dones')}}
+
+    def load_state_dict(self, state):
+        n = min(state['size'], self.capacity)
+        for name, array in state['arrays'].items():
+            getattr(self, name)[:n] = np.asarray(array[:n])
+        self.size = n
+        self.position = state['position'] % self.capacity
+
+    def append(self, state, action, reward, next_state, done):
+        i = self.position
+        self.states[i] = state
+        self.next_states[i] = next_state
+        self.actions[i] = np.argmax(action) if np.ndim(action) else action
+        self.rewards[i] = reward
+        self.dones[i] = done
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, states, actions, rewards, next_states, dones):
+        # Wektorowy zapis wielu przejść naraz (np. z kilku plansz)
+        n = len(states)
+        idx = (self.position + np.arange(n)) % self.capacity
+        actions = np.asarray(actions)
+        self.states[idx] = states
+        self.next_states[idx] = next_states
+        self.actions[idx] = actions.argmax(axis=1) if actions.ndim == 2 else actions
+        self.rewards[idx] = rewards
+        self.dones[idx] = dones
+
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample_indices(self, batch_size):
+        if self.size > batch_size:
+            return np.random.randint(0, self.size, size=batch_size)
+        return np.arange(self.size)
+
+    def sample_n_step(self, batch_size, n, gamma, stride=1):
+        # Zwroty n-krokowe liczone wektorowo; przejścia tej samej gry leżą co `stride` pozycji
+        # (1 dla jednej gry, liczba plansz dla VecGame). Sekwencja kończy się na końcu gry lub bufora.
+        idx = self.sample_indices(batch_size)
+        oldest = self.position if self.size == self.capacity else 0
+        age = (idx - oldest) % self.capacity
+        offsets = np.arange(n) * stride
+        steps = (idx[:, None] + offsets) % self.capacity
+
+        available = age[:, None] + offsets < self.size
+        dones = self.dones[steps] & available
+        done_before = (np.cumsum(dones, axis=1) - dones) > 0
+        valid = available & ~done_before
+
+        returns = (self.rewards[steps] * valid * gamma ** np.arange(n)).sum(axis=1)
+        last = valid.sum(axis=1) - 1
+        last_steps = steps[np.arange(len(idx)), last]
+        return (torch.from_numpy(self.states[idx]),
+                torch.from_numpy(self.actions[idx].astype(np.int64)),
+                torch.from_numpy(returns.astype(np.float32)),
+                torch.from_numpy(self.next_states[last_steps]),
+                torch.from_numpy(self.dones[last_steps]),
+                torch.from_numpy((gamma ** (last + 1)).astype(np.float32)))
+
+    def sample(self, batch_size):
+        idx = self.sample_indices(batch_size)
+        return (torch.from_numpy(self.states[idx]),
+                torch.from_numpy(self.actions[idx].astype(np.int64)),
+                torch.from_numpy(self.rewards[idx]),
+                torch.from_numpy(self.next_states[idx]),
+                torch.from_numpy(self.dones[idx]))
@@ -0,0 +1,179 @@
+import time
+import numpy as np
+from constants import *
+from engine import SHAPES, TetrisEngine
+from cache import LRUCache
+from placement import enumerate_placements, piece_placements
+
+# Sterowanie przez przeszukiwanie: aktualny, następny i trzymany klocek (beam + wartość oczekiwana
+# po nieznanym klocku), z limitem czasu i węzłów na ruch oraz pamięcią ocenionych plansz.
+
+GAMEOVER_VALUE = -1e9
+
+
+class HeuristicEvaluator:
+    # Wagi z klasycznego agenta heurystycznego (wysokość, linie, dziury, wyboistość)
+    def __init__(self, height=-0.510066, lines=0.760666, holes=-0.35663, bumpiness=-0.184483):
+        self.height = height
+        self.lines = lines
+        self.holes = holes
+        self.bumpiness = bumpiness
+
+    def __call__(self, leaves):
+        values = []
+        for board, lines, shape, next_shape in leaves:
+            heights = board.col_heights()
+            values.append(self.height * sum(heights) + self.lines * lines
+                          + self.holes * board.covered_cells() + self.bumpiness * board.bumpiness(heights))
+        return np.array(values)
+
+
+class QNetEvaluator:
+    # Wartość planszy = max Q z Linear_QNet na cechach Agent.get_state, jeden forward na batch
+    def __init__(self, agent):
+        self.agent = agent
+
+    def __call__(self, leaves):
+        # Nieznany aktualny klocek rozwijamy na 7 kształtów i uśredniamy
+        expanded = [[(board, shape, next_shape)] if shape else [(board, s, next_shape) for s in SHAPES]
+                    for board, lines, shape, next_shape in leaves]
+        states = self.agent.get_states([TetrisEngine.from_board(board, shape, next_shape)
+                                        for group in expanded for board, shape, next_shape in group])
+        q_values = self.agent.policy.predict(states).max(dim=1).values.numpy()
+
+        values, i = [], 0
+        for group in expanded:
+            values.append(q_values[i:i + len(group)].mean())
+            i += len(group)
+        return np.array(values)
+
+
+class SearchController:
+    def __init__(self, evaluator=None, beam_width=6, time_budget=0.05, node_budget=4000, memo_size=200000,
+                 chunk_size=8):
+        self.evaluator = evaluator or HeuristicEvaluator()
+        self.beam_width = beam_width
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        # Liście drugiej warstwy oceniane porcjami po chunk_size, z kontrolą budżetu między porcjami
+        self.chunk_size = chunk_size
+        self.memo = LRUCache(memo_size)
+        self.nodes = 0
+
+    def over_budget(self):
+        return self.nodes >= self.node_budget or time.perf_counter() - self.start > self.time_budget
+
+    def evaluate(self, leaves, bounded=False):
+        # Ocena liści z pamięcią: ten sam stan planszy (+ klocki) liczony tylko raz.
+        # bounded=True: None, gdy kolejna porcja przekroczyłaby budżet czasu lub węzłów
+        keys = [(tuple(board.rows), lines, shape, next_shape) for board, lines, shape, next_shape in leaves]
+        values = [self.memo.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        self.nodes += len(leaves) - len(missing)
+        for start in range(0, len(missing), self.chunk_size):
+            chunk = missing[start:start + self.chunk_size]
+            if bounded and (self.over_budget() or self.nodes + len(chunk) > self.node_budget):
+                return None
+            for i, value in zip(chunk, self.evaluator([leaves[i] for i in chunk])):
+                values[i] = float(value)
+                self.memo.put(keys[i], values[i])
+            self.nodes += len(chunk)
+        return values
+
+    def expand(self, board, shape, next_shape, hold_shape=None, lines_so_far=0):
+        # Najlepsza wartość położenia znanego klocka (opcjonalnie z wymianą na trzymany); None po przekroczeniu budżetu
+        candidates = [(p, shape) for p in piece_placements(board, shape, 0, *SPAWN_OFFSET)]
+        if hold_shape is not None:
+            candidates += [(p, hold_shape) for p in piece_placements(board, hold_shape, 0, *SPAWN_OFFSET)]
+
+        leaves = []
+        for placement, _ in candidates:
+            if any(y < 0 for _, y in placement.blocks):
+                continue
+            after, lines = board.placed(placement.blocks)
+            leaves.append((after, lines_so_far + lines, next_shape, None))
+        if not leaves:
+            return GAMEOVER_VALUE
+        values = self.evaluate(leaves, bounded=True)
+        return None if values is None else max(values)
+
+    def expected(self, board, hold_shape, lines_so_far=0):
+        # Nieznany klocek: średnia po 7 kształtach (losowanie jednostajne)
+        total = 0
+        for shape in SHAPES:
+            value = self.expand(board, shape, None, hold_shape, lines_so_far)
+            if value is None:
+                return None
+            total += value
+        return total / len(SHAPES)
+
+    def choose(self, tetris):
+        self.start = time.perf_counter()
+        self.nodes = 0
+
+        current = tetris.tetromino.shape
+        next_shape = tetris.next_tetromino.shape
+        held = tetris.held_tetromino.shape if tetris.held_tetromino else None
+
+        placements = enumerate_placements(tetris)
+        children = []
+        for placement in placements:
+            if any(y < 0 for _, y in placement.blocks):
+                children.append(None)
+                continue
+            after, lines = tetris.board.placed(placement.blocks)
+            if not placement.hold:
+                context = (next_shape, held)
+            elif held is None:
+                context = (None, current)  # następny poszedł na planszę, kolejny nieznany
+            else:
+                context = (next_shape, current)
+            children.append((after, lines, context))
+
+        valid = [i for i, child in enumerate(children) if child is not None]
+        if not valid:
+            return placements[0]
+
+        shallow = self.evaluate([(children[i][0], children[i][1], children[i][2][0], None) for i in valid])
+        values = dict(zip(valid, shallow))
+
+        # Druga warstwa tylko dla najlepszych kandydatów, dopóki starcza budżetu
+        # (wartości z różnych głębokości nie są porównywalne, więc wybieramy spośród rozwiniętych)
+        beam = sorted(valid, key=values.get, reverse=True)[:self.beam_width]
+        deep_values = {}
+        for i in beam:
+            if self.over_budget():
+                break
+            after, lines, (shape, hold_shape) = children[i]
+            if shape is None:
+                value = self.expected(after, hold_shape, lines)
+            else:
+                value = self.expand(after, shape, None, hold_shape, lines)
+            if value is None:
+                break
+            deep_values[i] = value
+
+        if len(deep_values) == len(beam):
+            values = deep_values  # inaczej budżet skończył się w połowie warstwy - zostaje ocena płytka
+        best = max(values, key=values.get)
+        return placements[best]
+
+
+def play(watch=True, seed=None, evaluator=None):
+    from engine import HeadlessApp
+    controller = SearchController(evaluator)
+    game = HeadlessApp(seed)
+    if watch:
+        from main import WatchApp
+        game = WatchApp(game)
+
+    while True:
+        placement = controller.choose(game.tetris)
+        reward, game_over, score = game.play_placement(placement)
+        if game_over:
+            print('Wynik: ', score)
+            game.tetris.reset()
+
+
+if __name__ == '__main__':
+    play()
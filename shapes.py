@@ -0,0 +1,57 @@
+from constants import *
+
+# Tablice obrotów liczone raz: offsety (względem bloku 0) dla 4 stanów obrotu każdego kształtu
+# oraz maski bitowe wierszy do testu kolizji na Bitboard. Gra nie ma "wall kicków" - obrót
+# z kolizją jest po prostu odrzucany, więc nie ma tabeli przesunięć.
+
+
+def rotate_offsets(offsets):
+    return [(-dy, dx) for dx, dy in offsets]
+
+
+def build_rotations():
+    rotations = {}
+    for shape, offsets in TETROMINOES.items():
+        states = [list(offsets)]
+        for _ in range(3):
+            states.append(states[-1] if shape == 'O' else rotate_offsets(states[-1]))
+        rotations[shape] = [tuple(state) for state in states]
+    return rotations
+
+
+def build_masks(rotations):
+    # Dla każdego obrotu: (min_dx, max_dx, [(dy, maska wiersza od min_dx)])
+    masks = {}
+    for shape, states in rotations.items():
+        masks[shape] = []
+        for offsets in states:
+            min_dx = min(dx for dx, _ in offsets)
+            max_dx = max(dx for dx, _ in offsets)
+            rows = {}
+            for dx, dy in offsets:
+                rows[dy] = rows.get(dy, 0) | 1 << (dx - min_dx)
+            masks[shape].append((min_dx, max_dx, tuple(sorted(rows.items()))))
+    return masks
+
+
+ROTATIONS = build_rotations()
+ROTATION_MASKS = build_masks(ROTATIONS)
+
+
+def piece_cells(shape, rotation, x, y):
+    return [(x + dx, y + dy) for dx, dy in ROTATIONS[shape][rotation]]
+
+
+def collides(board, shape, rotation, x, y):
+    # Odpowiednik Block.is_collide dla całego klocka: poza planszą z boku/dołu albo na zajętym polu
+    min_dx, max_dx, rows = ROTATION_MASKS[shape][rotation]
+    if x + min_dx < 0 or x + max_dx >= FIELD_W:
+        return True
+    board_rows = board.rows
+    for dy, mask in rows:
+        row = y + dy
+        if row >= FIELD_H:
+            return True
+        if row >= 0 and board_rows[row] & (mask << (x + min_dx)):
+            return True
+    return False
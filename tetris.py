@@ -3,31 +3,68 @@ import copy
 import pygame.freetype as ft
 from settings import *
 from tetromino import Tetromino
+from board import Bitboard, BoardStats
+from pieces import PieceSource
+
+
+def draw_grid(surface):
+    for x in range(FIELD_W):
+        for y in range(FIELD_H):
+            pg.draw.rect(surface, 'black',
+                         ((x * TILE_SIZE) + FIELD_OFFSET_X, y * TILE_SIZE, TILE_SIZE, TILE_SIZE), 1)
 
 
 class Text:
     def __init__(self, app):
         self.app = app
         self.font = ft.Font(FONT_PATH)
+        self.score = None  # Ostatnio narysowany wynik i jego prostokąt (do odświeżania tylko przy zmianie)
+        self.score_rect = None
 
-    def draw(self):
+    def draw_static(self, surface):
+        # Stałe napisy - rysowane raz, na warstwie tła
         window = FIELD_OFFSET_X *0.4
-        self.font.render_to(self.app.screen, (window + WIN_W * 0.595, WIN_H * 0.02),
+        self.font.render_to(surface, (window + WIN_W * 0.595, WIN_H * 0.02),
                             text='Tetris', fgcolor='white', size=TILE_SIZE * 1.65, bgcolor='black')
-        self.font.render_to(self.app.screen, (window + WIN_W * 0.65, WIN_H * 0.22),
+        self.font.render_to(surface, (window + WIN_W * 0.65, WIN_H * 0.22),
                             text='Next', fgcolor='white', size=TILE_SIZE * 1.4, bgcolor='black')
-        self.font.render_to(self.app.screen, (window + WIN_W * 0.64, WIN_H * 0.67),
+        self.font.render_to(surface, (window + WIN_W * 0.64, WIN_H * 0.67),
                             text='Score', fgcolor='white', size=TILE_SIZE * 1.4, bgcolor='black')
-        self.font.render_to(self.app.screen, (window + WIN_W * 0.64, WIN_H * 0.8),
-                            text=f'{self.app.tetris.score}', fgcolor='white', size=TILE_SIZE * 1.8)
-        self.font.render_to(self.app.screen, (WIN_W * 0.04, WIN_H * 0.02),
+        self.font.render_to(surface, (WIN_W * 0.04, WIN_H * 0.02),
                             text='Held', fgcolor='white', size=TILE_SIZE * 1.4, bgcolor='black')
 
+    def draw_score(self, background=None):
+        # Wynik renderowany tylko po zmianie; zwraca prostokąty do odświeżenia
+        score = self.app.tetris.score
+        if score == self.score:
+            return []
+        window = FIELD_OFFSET_X *0.4
+        dirty = []
+        if self.score_rect is not None and background is not None:
+            self.app.screen.blit(background, self.score_rect, self.score_rect)
+            dirty.append(self.score_rect)
+        self.score_rect = self.font.render_to(self.app.screen, (window + WIN_W * 0.64, WIN_H * 0.8),
+                                              text=f'{score}', fgcolor='white', size=TILE_SIZE * 1.8)
+        self.score = score
+        return dirty + [self.score_rect]
+
+    def invalidate(self):
+        self.score = None
+        self.score_rect = None
+
+    def draw(self):
+        self.draw_static(self.app.screen)
+        self.invalidate()
+        self.draw_score()
+
 class Tetris:
-    def __init__(self, app):
+    def __init__(self, app, pieces=None):
         self.app = app
+        self.pieces = pieces or PieceSource()
         self.sprite_group = pg.sprite.Group()
         self.field_array = self.get_field_array()
+        self.board = Bitboard()
+        self.stats = BoardStats(self.board)
         self.tetromino = Tetromino(self)
         self.next_tetromino = Tetromino(self, current=False)
         self.held_tetromino = None
@@ -43,59 +80,28 @@ class Tetris:
         self.score += self.points_per_level[self.full_lines]
         self.full_lines = 0
 
+    # Cechy planszy liczone na masce bitowej (self.board), zsynchronizowanej z field_array
     def get_avg_height(self):
-        total_height = 0
-        filled_columns = 0
-
-        for x in range(FIELD_W):
-            column_height = 0
-            for y in range(FIELD_H):
-                if self.field_array[y][x]:
-                    column_height = FIELD_H - y
-                    break
-            if column_height > 0:
-                total_height += column_height
-                filled_columns += 1
-
-        return total_height / filled_columns if filled_columns > 0 else 0
+        return self.board.avg_height()
 
     def get_col_height(self, col):
-        for y in range(FIELD_H):
-            if self.field_array[y][col]:
-                return FIELD_H - y
-        return 0
+        return self.board.col_height(col)
 
     def calculate_bumpiness(self):
-        bumpiness = 0
-        prev_height = -1
-        for c in range(FIELD_W):
-            h = self.get_col_height(c)
-            if prev_height != -1:
-                bumpiness += abs(h - prev_height)
-            prev_height = h
-        return bumpiness
+        return self.board.bumpiness()
 
     def count_holes(self):
-        holes = 0
+        return self.board.holes()
 
-        for x in range(FIELD_W):
-            has_block_above = False
-            for y in range(FIELD_H):
-                if self.field_array[y][x]:
-                    has_block_above = True
-                elif has_block_above and not self.field_array[y][x]:
-                    if y + 1 < FIELD_H and self.field_array[y + 1][x]:
-                        if (y + 1 == FIELD_H - 1) or (y + 2 < FIELD_H and self.field_array[y + 2][x]):
-                            holes += 1
-                elif has_block_above and self.field_array[y][x]:
-                    has_block_above = True
-
-        return holes
+    def tetromino_cells(self):
+        return self.tetromino.cells()
 
     def put_tetromino_in_array(self):
         for block in self.tetromino.blocks:
             x, y = int(block.pos.x), int(block.pos.y)
             self.field_array[y][x] = block
+            self.board.set(x, y)
+        self.stats.on_lock(self.tetromino_cells())
 
     def get_field_array(self):
         return [[0 for x in range(FIELD_W)] for y in range(FIELD_H)]
@@ -148,6 +154,10 @@ class Tetris:
             self.hold_tetromino()
 
     def chceck_full_rows(self):
+        full_rows = self.board.full_rows()
+        if not full_rows:
+            return 0
+
         row = FIELD_H - 1
         lines_cleared = 0
         for y in range(FIELD_H - 1, -1, -1):
@@ -157,7 +167,7 @@ class Tetris:
                 if self.field_array[y][x]:
                     self.field_array[row][x].pos = vec(x, y)
 
-            if sum(map(bool, self.field_array[y])) < FIELD_W:
+            if y not in full_rows:
                 row -= 1
             else:
                 for x in range(FIELD_W):
@@ -165,12 +175,16 @@ class Tetris:
                     self.field_array[row][x] = 0
 
                 lines_cleared += 1
+        self.board.clear_full_rows()
+        self.stats.mark_dirty()
         self.full_lines += lines_cleared
         return lines_cleared
 
     def reset(self):
         self.sprite_group = pg.sprite.Group()
         self.field_array = self.get_field_array()
+        self.board = Bitboard()
+        self.stats = BoardStats(self.board)
         self.tetromino = Tetromino(self)
         self.next_tetromino = Tetromino(self, current=False)
         self.held_tetromino = None
@@ -181,28 +195,13 @@ class Tetris:
         self.score = 0
         self.full_lines = 0
 
-    def update(self):
-        trigger = [self.app.anim_trigger, self.app.fast_anim_trigger][self.speed_up]
+    def update(self, trigger=None):
+        # trigger=None: grawitacja z timerów AppAi; False, gdy krok zegara został już wykonany (fall/drop)
+        if trigger is None:
+            trigger = [self.app.anim_trigger, self.app.fast_anim_trigger][self.speed_up]
 
         if trigger:
-            x = self.chceck_full_rows()
-            match x:
-                case 1:
-                    self.reward += 2000000
-                    print(f"Nagroda za 1 wypełniony wiersz: {self.reward}")
-                case 2:
-                    self.reward += 4000000
-                    print(f"Nagroda za 2 wypełnione wiersze: {self.reward}")
-                case 3:
-                    self.reward += 8000000
-                    print(f"Nagroda za 3 wypełnione wiersze: {self.reward}")
-                case 4:
-                    self.reward += 15000000
-                    print(f"Nagroda za 4 wypełnione wiersze: {self.reward}")
-
-            self.tetromino.update()
-            self.chceck_tetromino_landing()
-            self.get_score()
+            self.fall()
 
         self.sprite_group.update()
 
@@ -212,6 +211,35 @@ class Tetris:
 
         return self.score, self.gameover, self.reward
 
+    def fall(self):
+        self.clear_lines()
+        self.tetromino.update()
+        self.chceck_tetromino_landing()
+        self.get_score()
+
+    def drop(self):
+        # Twarde opuszczenie jak TetrisEngine.drop: klocek do końca, blokada i czyszczenie wierszy w tym samym kroku
+        self.tetromino.hard_drop()
+        self.chceck_tetromino_landing()
+        self.clear_lines()
+        self.get_score()
+
+    def clear_lines(self):
+        x = self.chceck_full_rows()
+        match x:
+            case 1:
+                self.reward += 2000000
+                print(f"Nagroda za 1 wypełniony wiersz: {self.reward}")
+            case 2:
+                self.reward += 4000000
+                print(f"Nagroda za 2 wypełnione wiersze: {self.reward}")
+            case 3:
+                self.reward += 8000000
+                print(f"Nagroda za 3 wypełnione wiersze: {self.reward}")
+            case 4:
+                self.reward += 15000000
+                print(f"Nagroda za 4 wypełnione wiersze: {self.reward}")
+
     def analyze_field_after_game_over(self):
         reward = 0
         print('Reward: ', reward, '\n')
@@ -268,12 +296,10 @@ class Tetris:
 
         return reward
 
-    def draw_grid(self):
-        for x in range(FIELD_W):
-            for y in range(FIELD_H):
-                pg.draw.rect(self.app.screen, 'black',
-                             ((x * TILE_SIZE) + FIELD_OFFSET_X, y * TILE_SIZE, TILE_SIZE, TILE_SIZE), 1)
+    def draw_grid(self, surface=None):
+        draw_grid(surface or self.app.screen)
 
     def draw(self):
-        self.draw_grid()
+        # Siatka jest na warstwie tła (AppAi.background); zwraca prostokąty narysowanych klocków
         self.sprite_group.draw(self.app.screen)
+        return [sprite.rect.copy() for sprite in self.sprite_group]
@@ -1,5 +1,6 @@
 from settings import *
-import random
+from shapes import ROTATIONS, collides, piece_cells
+from pieces import SHAPES
 
 class Block(pg.sprite.Sprite):
     def __init__(self, tetromino, pos):
@@ -17,11 +18,6 @@ class Block(pg.sprite.Sprite):
         if not self.alive:
             self.kill()
 
-    def rotate(self, pivot_pos):
-        translated = self.pos - pivot_pos
-        rotated = translated.rotate(90)
-        return rotated + pivot_pos
-
     def set_rect_pos(self):
         if self.tetromino.held:
             pos = self.held_pos
@@ -48,36 +44,42 @@ class Block(pg.sprite.Sprite):
 class Tetromino:
     def __init__(self, tetris, held=False, current = True):
         self.tetris = tetris
-        self.shape = random.choice(list(TETROMINOES.keys()))
-        self.image = random.choice(tetris.app.img)
+        self.shape = tetris.pieces.next()
+        # Sprite zależy tylko od kształtu - nie zużywa losowań z generatora klocków
+        self.image = tetris.app.img[SHAPES.index(self.shape) % len(tetris.app.img)]
         self.blocks = [Block(self, pos) for pos in TETROMINOES[self.shape]]
         self.pos = vec(TETROMINOES[self.shape][0]) + POS_OFFSET
+        self.rotation = 0
         self.landing = False
         self.current  = current
         self.held = held
 
     def rotate(self):
-        pivot_pos = self.blocks[0].pos
+        # Obrót wokół bloku 0 z gotowej tablicy (shapes.ROTATIONS), kolizja na masce bitowej
+        rotation = (self.rotation + 1) % 4
+        x, y = int(self.blocks[0].pos.x), int(self.blocks[0].pos.y)
 
-        if self.blocks[0].tetromino.shape != 'O':
-            new_block_pos = [block.rotate(pivot_pos) for block in self.blocks]
-        else:
-            new_block_pos = [block.pos for block in self.blocks]
+        if not collides(self.tetris.board, self.shape, rotation, x, y):
+            for block, pos in zip(self.blocks, piece_cells(self.shape, rotation, x, y)):
+                block.pos = vec(pos)
+            self.rotation = rotation
 
-        if not self.is_collide(new_block_pos):
-            for i, block in enumerate(self.blocks):
-                block.pos = new_block_pos[i]
+    def cells(self):
+        return [(int(block.pos.x), int(block.pos.y)) for block in self.blocks]
+
+    def landing_distance(self):
+        return self.tetris.board.drop_distance(self.cells())
 
     def calculate_landing_position(self):
-        new_blocks = [Block(self, block.pos.copy()) for block in self.blocks]
-        while True:
-            new_block_pos = [block.pos + vec(0, 1) for block in new_blocks]
-            if self.is_collide(new_block_pos):
-                break
-            for i, block in enumerate(new_blocks):
-                block.pos = new_block_pos[i]
+        # Pozycja "ducha" jako współrzędne całkowite - bez tworzenia nowych spritów
+        distance = self.landing_distance()
+        return [(x, y + distance) for x, y in self.cells()]
 
-        return new_blocks
+    def hard_drop(self):
+        distance = self.landing_distance()
+        for block in self.blocks:
+            block.pos.y += distance
+        self.landing = True
 
     def can_move(self, dx, dy):
         for block in self.blocks:
@@ -100,8 +102,9 @@ class Tetromino:
         block.kill()
 
     def reset_position(self):
-        for i, block in enumerate(self.blocks):
-            block.pos = vec(TETROMINOES[self.shape][i]) + POS_OFFSET
+        self.rotation = 0
+        for block, offset in zip(self.blocks, ROTATIONS[self.shape][0]):
+            block.pos = vec(offset) + POS_OFFSET
 
     def is_collide(self, block_pos):
         return any(map(Block.is_collide, self.blocks, block_pos))
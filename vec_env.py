@@ -0,0 +1,37 @@
+import numpy as np
+from engine import HeadlessApp, TickClock
+from pieces import UNIFORM
+
+# N niezależnych plansz krokowanych razem - jeden batch stanów i jeden forward na krok
+
+
+class VecGame:
+    def __init__(self, n_games, seed=None, clock_factory=None, piece_mode=UNIFORM):
+        clock_factory = clock_factory or TickClock
+        self.games = [HeadlessApp(None if seed is None else seed + i, clock_factory(), piece_mode=piece_mode)
+                      for i in range(n_games)]
+        self.rewards = np.zeros(n_games, dtype=np.float32)
+        self.dones = np.zeros(n_games, dtype=np.bool_)
+        self.scores = np.zeros(n_games, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.games)
+
+    def get_states(self, agent, out=None):
+        if out is None:
+            out = np.empty((len(self.games), agent.state_size), dtype=np.float32)
+        for i, game in enumerate(self.games):
+            agent.get_state(game, out[i])
+        return out
+
+    def play_step(self, actions):
+        for i, game in enumerate(self.games):
+            self.rewards[i], self.dones[i], self.scores[i] = game.play_step(actions[i])
+        return self.rewards, self.dones, self.scores
+
+    def reset_done(self, agent, states):
+        # Restart zakończonych gier i podmiana ich wierszy w batchu stanów
+        for i in np.flatnonzero(self.dones):
+            self.games[i].tetris.reset()
+            agent.get_state(self.games[i], states[i])
+        return states